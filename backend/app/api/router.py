@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.routes import scrape, precache
+from app.api.routes import scrape, precache, analytics, finance
 
 api_router = APIRouter()
 
@@ -15,4 +15,18 @@ api_router.include_router(
     precache.router,
     prefix="/precache",
     tags=["precache"],
+)
+
+# Market stats over the listings cache
+api_router.include_router(
+    analytics.router,
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+# Financing scenarios
+api_router.include_router(
+    finance.router,
+    prefix="/finance",
+    tags=["finance"],
 )
\ No newline at end of file
@@ -1,11 +1,25 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import FileResponse
-from pathlib import Path
+from typing import Optional
 
-router = APIRouter(prefix="/admin", tags=["admin"])
+from app.db.cache import memory_tier
+from app.db.connection import run_db
+from app.db.logging import log_writer, get_conn as get_logging_conn
+from app.db.log_retention import ARCHIVE_DIR
+from app.db.log_rollups import traffic_summary, top_ips
+from app.db.snapshots import snapshot_stats
+from app.services.browser_pool import browser_pool
+from app.services.cache_refresher import cache_refresher
+from app.services.fetch_scheduler import fetch_scheduler
+from app.services.market_stats import market_stats
+from app.services.parse_pool import parse_pool
+from app.services.precache_queue import precache_queue
+from app.services.rate_limiter import rate_limiter
+from app.services.reparser import reparser
+from app.services.scraper import change_detection_stats, fetch_source_stats, scrape_flight_stats
 
-BASE_DIR = Path(__file__).resolve().parents[3]
-ARCHIVE_DIR = BASE_DIR / "data" / "archives"
+router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get("/logs/{filename}")
 def download_log_archive(filename: str):
@@ -18,4 +32,60 @@ def download_log_archive(filename: str):
         path,
         media_type="application/gzip",
         filename=filename,
-    )
\ No newline at end of file
+    )
+
+@router.get("/stats")
+def runtime_stats():
+    """ Returns in-process counters for the shared scraping resources. """
+    return {
+        "browser_pool": browser_pool.stats(),
+        "fetch_sources": fetch_source_stats(),
+        "change_detection": change_detection_stats(),
+        "scrape_coalescing": scrape_flight_stats(),
+        "fetch_scheduler": fetch_scheduler.stats(),
+        "parse_pool": parse_pool.stats(),
+        "listing_cache": memory_tier.stats(),
+        "log_writer": log_writer.stats(),
+        "precache_queue": precache_queue.stats(),
+        "cache_refresher": cache_refresher.stats(),
+        "market_stats": market_stats.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "reparser": reparser.stats(),
+    }
+
+def _traffic_summary(start, end, endpoint):
+    return traffic_summary(get_logging_conn(), start, end, endpoint)
+
+def _top_ips(start, end, endpoint, limit):
+    return top_ips(get_logging_conn(), start, end, endpoint, limit)
+
+@router.get("/traffic")
+async def traffic(
+    start: Optional[datetime] = Query(None, description="Range start (UTC), default 24h before end"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC), default now"),
+    endpoint: Optional[str] = None,
+):
+    """ Latency percentiles, error rates and cache-hit ratio per endpoint, from the per-minute rollups. """
+    return {"endpoints": await run_db(_traffic_summary, start, end, endpoint)}
+
+@router.get("/traffic/top-ips")
+async def traffic_top_ips(
+    start: Optional[datetime] = Query(None, description="Range start (UTC), default 24h before end"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC), default now"),
+    endpoint: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=500),
+):
+    """ Busiest client IPs in the live (current month) log table. """
+    return {"ips": await run_db(_top_ips, start, end, endpoint, limit)}
+
+@router.get("/snapshots")
+async def snapshots():
+    """ Size of the HTML snapshot store and the state of the reparse job. """
+    return {"store": await run_db(snapshot_stats), "reparse": reparser.stats()}
+
+@router.post("/reparse", status_code=202)
+async def reparse():
+    """ Re-parses every stored snapshot into the listings cache in the background. """
+    if not reparser.start():
+        raise HTTPException(status_code=409, detail="A reparse is already running")
+    return {"status": "started"}
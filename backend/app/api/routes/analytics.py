@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+
+from app.services.market_stats import market_stats
+from app.db.cache import get_listing_history
+from app.db.connection import run_db
+
+router = APIRouter()
+
+class GroupStats(BaseModel):
+    key: str
+    count: int
+    price: Dict[str, Optional[float]]
+    depreciation: Dict[str, Optional[float]]
+    median_coe_left_months: Optional[float] = None
+    median_coe_left_value: Optional[float] = None
+    median_price_per_bhp: Optional[float] = None
+
+class MarketStatsResponse(BaseModel):
+    group_by: str
+    groups: List[GroupStats]
+
+class HistoryPoint(BaseModel):
+    changed_at: str
+    old_price: Optional[float] = None
+    price: Optional[float] = None
+    old_depreciation: Optional[float] = None
+    depreciation: Optional[float] = None
+
+class ListingHistoryResponse(BaseModel):
+    url: str
+    changes: List[HistoryPoint]
+
+@router.get(
+    "/market",
+    response_model=MarketStatsResponse,
+    summary="Price and depreciation distributions over cached listings",
+)
+async def market(
+    group_by: Literal["model", "type", "vehicle_type"] = "model",
+    key: Optional[str] = Query(None, description="Only return this group"),
+    min_count: int = Query(1, ge=1, description="Skip groups with fewer listings"),
+):
+    """
+    Price and depreciation percentiles (p10-p90), median COE left (months
+    and prorated COE value) and median price per bhp, per group.
+    """
+    groups = await run_db(market_stats.get, group_by, key, min_count)
+    if key is not None and not groups:
+        raise HTTPException(status_code=404, detail=f"No cached listings with {group_by} '{key}'")
+    return MarketStatsResponse(group_by=group_by, groups=groups)
+
+@router.get(
+    "/history",
+    response_model=ListingHistoryResponse,
+    summary="Price and depreciation changes of one listing",
+)
+async def history(
+    url: str = Query(..., description="Listing URL"),
+    limit: int = Query(100, ge=1, le=1000, description="Most recent changes to return"),
+):
+    """
+    Every recorded price or depreciation change of a listing, oldest first.
+    The first entry is when it was first cached (old values null).
+    """
+    changes = await run_db(get_listing_history, url, limit)
+    if not changes:
+        raise HTTPException(status_code=404, detail="No history for this listing")
+    return ListingHistoryResponse(url=url, changes=changes)
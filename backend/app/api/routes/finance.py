@@ -0,0 +1,89 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.core.config import FINANCE_RATES, FINANCE_MAX_GRID_CELLS
+from app.db.cache import lookup_listings
+from app.db.connection import run_db
+from app.utils.finance import monthly_grid
+
+router = APIRouter()
+
+class FinanceRequest(BaseModel):
+    # Cached listings to finance (their price and loan term are used)
+    urls: List[str] = []
+    # Ad hoc prices; need loan_terms
+    prices: List[float] = []
+    downpayments: Optional[List[float]] = None
+    interest_rates: Optional[List[float]] = None
+    # Overrides each listing's own loan_term_months
+    loan_terms: Optional[List[int]] = None
+
+class FinanceResult(BaseModel):
+    url: Optional[str] = None
+    price: float
+    loan_terms: List[int]
+    # monthly[loan term][down payment][interest rate]
+    monthly: List[List[List[float]]]
+
+class FinanceResponse(BaseModel):
+    downpayments: List[float]
+    interest_rates: List[float]
+    results: List[FinanceResult]
+    # Not cached, or cached without a price or loan term
+    unpriced_urls: List[str] = []
+
+@router.post(
+    "",
+    response_model=FinanceResponse,
+    summary="Monthly instalments over a down payment x interest rate x loan term grid",
+)
+async def finance(payload: FinanceRequest):
+    """
+    Computes flat-rate monthly instalments for cached listings and/or ad hoc
+    prices. Down payments and rates default to the configured rate table.
+    """
+    if not payload.urls and not payload.prices:
+        raise HTTPException(status_code=400, detail="Provide listing urls or prices.")
+    if payload.prices and not payload.loan_terms:
+        raise HTTPException(status_code=400, detail="loan_terms is required when pricing ad hoc prices.")
+
+    downpayments = payload.downpayments or list(dict.fromkeys(dp for dp, _ in FINANCE_RATES))
+    interest_rates = payload.interest_rates or list(dict.fromkeys(rate for _, rate in FINANCE_RATES))
+
+    entries = []  # (url, price, loan terms)
+    unpriced_urls = []
+    if payload.urls:
+        cached, _ = await run_db(lookup_listings, payload.urls)
+        for url in dict.fromkeys(payload.urls):
+            listing = cached.get(url)
+            if listing and listing.get("price") and (payload.loan_terms or listing.get("loan_term_months")):
+                entries.append((url, listing["price"], payload.loan_terms or [listing["loan_term_months"]]))
+            else:
+                unpriced_urls.append(url)
+    entries.extend((None, price, payload.loan_terms) for price in payload.prices)
+
+    terms_per_entry = len(payload.loan_terms) if payload.loan_terms else 1
+    cells = len(entries) * terms_per_entry * len(downpayments) * len(interest_rates)
+    if cells > FINANCE_MAX_GRID_CELLS:
+        raise HTTPException(status_code=400, detail=f"Scenario grid too large ({cells} cells, max {FINANCE_MAX_GRID_CELLS}).")
+
+    results = []
+    if entries:
+        grid = monthly_grid(
+            [price for _, price, _ in entries],
+            [terms for _, _, terms in entries],
+            downpayments,
+            interest_rates,
+        ).tolist()
+        results = [
+            FinanceResult(url=url, price=price, loan_terms=terms, monthly=monthly)
+            for (url, price, terms), monthly in zip(entries, grid)
+        ]
+
+    return FinanceResponse(
+        downpayments=downpayments,
+        interest_rates=interest_rates,
+        results=results,
+        unpriced_urls=unpriced_urls,
+    )
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.core.config import METRICS_ENABLED
+from app.core.metrics import CONTENT_TYPE, render
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", summary="Prometheus metrics")
+def metrics():
+    """ Request and per-stage counters and histograms in the Prometheus text format. """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(render(), media_type=CONTENT_TYPE)
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Request, HTTPException
+import logging
+
+from fastapi import APIRouter, Request, Response, HTTPException
 from pydantic import BaseModel
-from datetime import datetime, timezone
+from typing import List, Optional
 
-from app.services.scraper import scrape_listings
+from app.services.precache_queue import precache_queue
 from app.services.rate_limiter import rate_limiter
-from app.db.cache import get_cached_listing, upsert_listing
-from app.db.logging import log_api_call
+from app.db.cache import get_cached_listings
+from app.db.connection import run_db
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -20,19 +24,33 @@ class PrecacheResponse(BaseModel):
     status: str
     url: str
     cached: bool = False
+    job_id: Optional[str] = None
+
+class PrecacheJobResponse(BaseModel):
+    job_id: str
+    status: str
+    urls: List[str]
+    cached_urls: List[str] = []
+    failed_urls: List[str] = []
+    created_at: str
+    finished_at: Optional[str] = None
 
 @router.post(
     "",
     response_model=PrecacheResponse,
     summary="Pre-cache a single car listing URL",
+    responses={202: {"model": PrecacheResponse, "description": "Queued for background scraping"}},
 )
-async def precache(payload: PrecacheRequest, request: Request):
+async def precache(payload: PrecacheRequest, request: Request, response: Response):
     """
-    Pre-caches a single URL synchronously.
-    Returns after scraping completes with success/failure status.
+    Queues a single URL for background scraping and returns 202 with a job
+    id right away (200 if it is already cached). Poll GET /precache/{job_id}
+    for the outcome.
     """
     url = payload.url
-    start_time = datetime.now(timezone.utc)
+    request.state.userrole = "free"
+    request.state.url_count = 1
+    request.state.cache_hits = 0
     
     if not url:
         raise HTTPException(status_code=400, detail="URL cannot be empty")
@@ -47,27 +65,25 @@ async def precache(payload: PrecacheRequest, request: Request):
     )
     
     # Check if already cached
-    cached = get_cached_listing(url)
+    cached = (await run_db(get_cached_listings, [url])).get(url)
     if cached:
-        print(f"[Precache] URL already cached: {url}")
+        logger.info(f"[PRECACHE] URL already cached: {url}")
         
-        process_time = (datetime.now(timezone.utc) - start_time).total_seconds()
-        log_api_call(
-            endpoint="/api/precache",
-            userrole="free",
-            url_count=1,
-            process_time=process_time,
-            status_code=200,
-            status_text="cache_hit",
-            ip_address=ip,
-            request_id=None,
-        )
+        request.state.status_text = "cache_hit"
+        request.state.cache_hits = 1
         
         return PrecacheResponse(status="already_cached", url=url, cached=True)
     
+    # Already queued by someone else: share that job, no extra scrape
+    if precache_queue.is_pending(url):
+        job = precache_queue.enqueue([url])
+        request.state.status_text = "merged"
+        response.status_code = 202
+        return PrecacheResponse(status=job.status, url=url, job_id=job.id)
+
     # Check rate limit
     config = RATE_LIMITS["free"]
-    allowed, wait_time = rate_limiter.is_allowed(
+    allowed, wait_time = await rate_limiter.is_allowed(
         key=ip,
         max_urls=config["max_urls"],
         window_seconds=config["window_seconds"],
@@ -75,59 +91,34 @@ async def precache(payload: PrecacheRequest, request: Request):
     )
     
     if not allowed:
-        print(f"[Precache] Rate limited for IP {ip}, wait {wait_time}s")
+        logger.info(f"[PRECACHE] Rate limited for IP {ip}, wait {wait_time}s")
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded. Try again in {int(wait_time)} seconds."
         )
     
-    # Scrape synchronously
-    print(f"[Precache] Scraping: {url}")
-    status_text = "success"
-    status_code = 200
-    cached_successfully = False
-    
-    try:
-        scraped, failed_urls = await scrape_listings([url])
-        
-        if failed_urls:
-            print(f"[Precache] Failed to scrape: {url}")
-            status_text = "scrape_failed"
-            status_code = 500
-        elif scraped and len(scraped) > 0:
-            listing = scraped[0]
-            if listing and listing.url:
-                upsert_listing(listing.url, listing.model_dump())
-                print(f"[Precache] Successfully cached: {url}")
-                cached_successfully = True
-            else:
-                print(f"[Precache] Scrape returned empty data: {url}")
-                status_text = "empty_data"
-                status_code = 500
-        else:
-            print(f"[Precache] No results returned: {url}")
-            status_text = "no_results"
-            status_code = 500
-            
-    except Exception as e:
-        print(f"[Precache] Error scraping {url}: {e}")
-        status_text = f"error: {str(e)}"
-        status_code = 500
-    
-    # Log the attempt
-    process_time = (datetime.now(timezone.utc) - start_time).total_seconds()
-    log_api_call(
-        endpoint="/api/precache",
-        userrole="free",
-        url_count=1,
-        process_time=process_time,
-        status_code=status_code,
-        status_text=status_text,
-        ip_address=ip,
-        request_id=None,
+    job = precache_queue.enqueue([url])
+    logger.info(f"[PRECACHE] Queued {url} as job {job.id}")
+    request.state.status_text = "queued"
+    response.status_code = 202
+    return PrecacheResponse(status=job.status, url=url, job_id=job.id)
+
+@router.get(
+    "/{job_id}",
+    response_model=PrecacheJobResponse,
+    summary="Check the status of a pre-cache job",
+)
+async def precache_status(job_id: str):
+    job = precache_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Precache job not found")
+
+    return PrecacheJobResponse(
+        job_id=job.id,
+        status=job.status,
+        urls=job.urls,
+        cached_urls=job.cached_urls,
+        failed_urls=job.failed_urls,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
     )
-    
-    if cached_successfully:
-        return PrecacheResponse(status="cached", url=url, cached=True)
-    else:
-        return PrecacheResponse(status=status_text, url=url, cached=False)
\ No newline at end of file
@@ -1,11 +1,16 @@
+import json
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 
+from app.core.metrics import set_request_labels
 from app.models.car import CarListing
-from app.services.scraper import scrape_listings
+from app.services.scraper import scrape_listings, collect_listings
 from app.services.rate_limiter import rate_limiter
-from app.db.cache import get_cached_listing, upsert_listing
+from app.services.precache_queue import precache_queue
+from app.db.cache import lookup_listings, upsert_listings
+from app.db.connection import run_db
 
 router = APIRouter()
 
@@ -21,16 +26,22 @@ class ScrapeRequest(BaseModel):
 class ScrapeResponse(BaseModel):
     results: List[CarListing]
     failed_urls: List[str] = []
+    # Served from cache past their TTL; a background re-scrape is queued
+    stale_urls: List[str] = []
     message: Optional[str] = None
 
-@router.post(
-    "",
-    response_model=ScrapeResponse,
-    summary="Scrape and analyse car listings",
-)
-async def scrape(payload: ScrapeRequest, request: Request):
+def _client_ip(request: Request) -> str:
+    return (
+        request.headers.get("fly-client-ip")
+        or request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        or (request.client.host if request.client else "unknown")
+    )
+
+async def _prepare_scrape(payload: ScrapeRequest, request: Request) -> tuple[list, list[str], list[str]]:
     """
-    Scrapes a batch of car listing URLs with role-based limits.
+    Validates the request, serves cache hits and rate limits the rest.
+    Stale hits are served as well and queued for a background re-scrape.
+    Returns (cached_results, urls_to_scrape, stale_urls).
     """
     urls = payload.urls
     role = payload.userrole.lower()
@@ -38,30 +49,28 @@ async def scrape(payload: ScrapeRequest, request: Request):
     if not urls:
         raise HTTPException(status_code=400, detail="URL list cannot be empty. Paste at least one URL from Sgcarmart and press Enter.")
 
-    config = RATE_LIMITS.get(role, RATE_LIMITS["free"])
+    # Unknown roles are limited, and labelled in metrics, as free
+    tier = role if role in RATE_LIMITS else "free"
+    config = RATE_LIMITS[tier]
+    set_request_labels(role=tier)
+    request.state.metrics_role = tier
     
-    ip = (
-        request.headers.get("fly-client-ip")
-        or request.headers.get("x-forwarded-for", "").split(",")[0].strip()
-        or (request.client.host if request.client else "unknown")
-    )
+    ip = _client_ip(request)
     
     # Check cache first
     results = []
     urls_to_scrape = []
     
+    cached, stale = await run_db(lookup_listings, urls)
     for url in urls:
-        cached = get_cached_listing(url)
-        if cached:
-            results.append(cached)
+        if url in cached:
+            results.append(cached[url])
         else:
             urls_to_scrape.append(url)
     
-    failed_urls = []
-    
     # Only rate limit and scrape uncached URLs
     if urls_to_scrape:
-        allowed, wait_time = rate_limiter.is_allowed(
+        allowed, wait_time = await rate_limiter.is_allowed(
             key=ip,
             max_urls=config["max_urls"],
             window_seconds=config["window_seconds"],
@@ -73,27 +82,101 @@ async def scrape(payload: ScrapeRequest, request: Request):
                 status_code=429,
                 detail=f"Rate limit exceeded. Try again in {int(wait_time)} seconds."
             )
-        
+
+    # Serve stale hits now, refresh them in the background
+    stale_urls = [url for url in dict.fromkeys(urls) if url in stale]
+    if stale_urls:
+        precache_queue.enqueue(stale_urls)
+
+    # Attach metadata for logging
+    request.state.userrole = role
+    request.state.url_count = len(urls)
+    request.state.cache_hits = len(results)
+
+    return results, urls_to_scrape, stale_urls
+
+def _failure_message(failed_urls: list[str]) -> Optional[str]:
+    if failed_urls:
+        return f"{len(failed_urls)} link(s) could not be scraped"
+    return None
+
+@router.post(
+    "",
+    response_model=ScrapeResponse,
+    summary="Scrape and analyse car listings",
+)
+async def scrape(payload: ScrapeRequest, request: Request):
+    """
+    Scrapes a batch of car listing URLs with role-based limits.
+    """
+    results, urls_to_scrape, stale_urls = await _prepare_scrape(payload, request)
+    failed_urls = []
+
+    if urls_to_scrape:
         # Scrape uncached URLs
-        scraped, failed_urls = await scrape_listings(urls_to_scrape)
+        scraped, failed_urls = await collect_listings(urls_to_scrape, client=_client_ip(request))
         
         # Cache the new results (only successful ones with valid data)
-        for listing in scraped:
-            if listing and listing.url:
-                upsert_listing(listing.url, listing.model_dump())
+        await run_db(upsert_listings, [listing.model_dump() for listing in scraped if listing and listing.url])
         
         results.extend(scraped)
 
-    # Attach metadata for logging
-    request.state.userrole = role
-    request.state.url_count = len(urls)
-    
-    message = None
-    if failed_urls:
-        message = f"{len(failed_urls)} link(s) could not be scraped"
-    
     return ScrapeResponse(
         results=results,
         failed_urls=failed_urls,
-        message=message
-    )
\ No newline at end of file
+        stale_urls=stale_urls,
+        message=_failure_message(failed_urls)
+    )
+
+@router.post(
+    "/stream",
+    summary="Scrape car listings, streaming each result as NDJSON",
+)
+async def scrape_stream(payload: ScrapeRequest, request: Request):
+    """
+    Same as POST /scrape, but responds with newline-delimited JSON records:
+    cache hits first (flagged "stale" when past their TTL), then one
+    "listing" or "failed" record per scraped URL as soon as it is parsed,
+    and a final "summary" record.
+    """
+    cached_results, urls_to_scrape, stale_urls = await _prepare_scrape(payload, request)
+    stale = set(stale_urls)
+
+    async def records():
+        for listing in cached_results:
+            yield json.dumps({"type": "listing", "cached": True, "stale": listing.get("url") in stale, "listing": listing}) + "\n"
+
+        scraped = []
+        failed_urls = []
+        if urls_to_scrape:
+            reported = set()
+            try:
+                async for result in scrape_listings(urls_to_scrape, client=_client_ip(request)):
+                    reported.add(result.url)
+                    if result.success and result.listing.url:
+                        listing = result.listing.model_dump()
+                        scraped.append(listing)
+                        yield json.dumps({"type": "listing", "cached": False, "stale": False, "listing": listing}) + "\n"
+                    else:
+                        failed_urls.append(result.url)
+                        yield json.dumps({"type": "failed", "url": result.url, "error": result.error}) + "\n"
+            except Exception as e:
+                # The client still gets a record for every URL and the summary
+                for url in dict.fromkeys(urls_to_scrape):
+                    if url not in reported:
+                        failed_urls.append(url)
+                        yield json.dumps({"type": "failed", "url": url, "error": f"{type(e).__name__}: {e}"}) + "\n"
+            finally:
+                # One write for the whole batch, even if the client went away mid-stream
+                await run_db(upsert_listings, scraped)
+
+        yield json.dumps({
+            "type": "summary",
+            "cached": len(cached_results),
+            "scraped": len(scraped),
+            "failed_urls": failed_urls,
+            "stale_urls": stale_urls,
+            "message": _failure_message(failed_urls),
+        }) + "\n"
+
+    return StreamingResponse(records(), media_type="application/x-ndjson")
@@ -0,0 +1,143 @@
+import os
+from pathlib import Path
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_pairs(name: str, default: str) -> list[tuple[float, float]]:
+    """Parses "a:b,c:d" into [(a, b), (c, d)]."""
+    value = os.getenv(name) or default
+    return [tuple(float(x) for x in pair.split(":")) for pair in value.split(",") if pair.strip()]
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# ---- browser pool ----
+# Launch the shared Chromium instance during startup instead of on first use;
+# if the launch fails the app starts anyway and launches on first use
+BROWSER_PREWARM = _env_bool("BROWSER_PREWARM", True)
+# Recycle the browser after it has served this many pages
+BROWSER_MAX_PAGES = _env_int("BROWSER_MAX_PAGES", 200)
+# Playwright resource types aborted in browser contexts (comma separated,
+# empty loads everything); the parser only needs the DOM and img src values
+BROWSER_BLOCK_RESOURCES = [
+    t.strip() for t in os.getenv("BROWSER_BLOCK_RESOURCES", "image,media,font,stylesheet").lower().split(",") if t.strip()
+]
+# Abort analytics/ad hosts and third-party iframes
+BROWSER_BLOCK_TRACKERS = _env_bool("BROWSER_BLOCK_TRACKERS", True)
+# "selector" waits up to 2s for the title block after DOMContentLoaded,
+# "parseable" returns as soon as the blocks the parser reads are in the DOM
+PAGE_WAIT_MODE = os.getenv("PAGE_WAIT_MODE", "selector").lower()
+
+# ---- fetching ----
+# "auto" tries a plain HTTP request first and falls back to the browser,
+# "http" never uses the browser, "browser" always renders in Chromium
+FETCH_MODE = os.getenv("FETCH_MODE", "auto").lower()
+HTTP_TIMEOUT_SECONDS = _env_int("HTTP_TIMEOUT_SECONDS", 15)
+# Re-scrapes send the stored ETag / Last-Modified and skip parsing when the
+# listing's detail blocks are unchanged
+CHANGE_DETECTION_ENABLED = _env_bool("CHANGE_DETECTION_ENABLED", True)
+HTTP_MAX_CONNECTIONS = _env_int("HTTP_MAX_CONNECTIONS", 10)
+
+# ---- parsing ----
+# "process" parses in worker processes, "thread" in a thread pool
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "process").lower()
+PARSE_WORKERS = _env_int("PARSE_WORKERS", min(2, os.cpu_count() or 1))
+# Pages allowed in the executor at once; the rest wait on the event loop
+PARSE_MAX_QUEUE = _env_int("PARSE_MAX_QUEUE", 40)
+
+# ---- listings cache ----
+# Listings kept decoded in process memory in front of SQLite
+MEMORY_CACHE_MAX_ENTRIES = _env_int("MEMORY_CACHE_MAX_ENTRIES", 2000)
+# Listings past their TTL are still served (marked stale and re-scraped in
+# the background) for this long; older rows are treated as misses
+CACHE_STALE_GRACE_HOURS = _env_int("CACHE_STALE_GRACE_HOURS", 24 * 4)
+# Encoding of the listing fields kept outside the typed columns: "orjson"
+# (pinned in requirements.txt), "msgpack" (needs the msgpack package), "json",
+# or "auto" for orjson when available
+LISTING_CODEC = os.getenv("LISTING_CODEC", "auto").lower()
+
+# ---- cache refresher ----
+# How often access counts are written out and expiring listings refreshed
+REFRESH_INTERVAL_SECONDS = _env_int("REFRESH_INTERVAL_SECONDS", 300)
+# Listings within this many hours of expiring are refreshed ahead of time
+REFRESH_AHEAD_HOURS = _env_int("REFRESH_AHEAD_HOURS", 12)
+# Most-requested listings refreshed per run, and the hits needed to qualify
+REFRESH_BATCH_SIZE = _env_int("REFRESH_BATCH_SIZE", 20)
+REFRESH_MIN_HITS = _env_int("REFRESH_MIN_HITS", 2)
+# Only listings read within this many hours count as popular; hits are a
+# lifetime total, so old popularity alone never keeps a listing refreshed
+REFRESH_ACCESS_WINDOW_HOURS = _env_int("REFRESH_ACCESS_WINDOW_HOURS", 24)
+
+# ---- html snapshots ----
+# Fetched pages are kept compressed under DATA_DIR/snapshots so listings can
+# be re-parsed without scraping again
+SNAPSHOTS_ENABLED = _env_bool("SNAPSHOTS_ENABLED", True)
+# Oldest snapshots are dropped once the store grows past this
+SNAPSHOT_MAX_MB = _env_int("SNAPSHOT_MAX_MB", 1024)
+# "zstd" (needs the zstandard package), "gzip", or "auto" for zstd when available
+SNAPSHOT_CODEC = os.getenv("SNAPSHOT_CODEC", "auto").lower()
+# Snapshots loaded and parsed together by the reparse job
+REPARSE_BATCH_SIZE = _env_int("REPARSE_BATCH_SIZE", 100)
+
+# ---- sqlite ----
+# Use mounted volume path in production, local path in development
+DATA_DIR = Path(os.getenv("DATABASE_PATH") or Path(__file__).resolve().parents[2] / "data")
+DB_WORKERS = _env_int("DB_WORKERS", 4)
+DB_BUSY_TIMEOUT_MS = _env_int("DB_BUSY_TIMEOUT_MS", 5000)
+DB_MMAP_SIZE = _env_int("DB_MMAP_SIZE", 64 * 1024 * 1024)
+
+# ---- api request logging ----
+LOG_QUEUE_MAX = _env_int("LOG_QUEUE_MAX", 10000)
+LOG_BATCH_SIZE = _env_int("LOG_BATCH_SIZE", 200)
+LOG_FLUSH_INTERVAL_MS = _env_int("LOG_FLUSH_INTERVAL_MS", 1000)
+# Completed months are archived this long after startup, then once a day
+LOG_ARCHIVE_DELAY_SECONDS = _env_int("LOG_ARCHIVE_DELAY_SECONDS", 30)
+# Rows streamed into the archive / deleted per step
+LOG_ARCHIVE_CHUNK_ROWS = _env_int("LOG_ARCHIVE_CHUNK_ROWS", 5000)
+
+# ---- rate limiting ----
+# "memory" keeps limits per process, "sqlite" shares them between workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+# How often keys whose allowance has fully refilled are dropped
+RATE_LIMIT_SWEEP_SECONDS = _env_int("RATE_LIMIT_SWEEP_SECONDS", 60)
+
+# ---- precache queue ----
+PRECACHE_WORKERS = _env_int("PRECACHE_WORKERS", 2)
+# URLs scraped together by one worker
+PRECACHE_BATCH_SIZE = _env_int("PRECACHE_BATCH_SIZE", 5)
+# Finished jobs kept for status lookups
+PRECACHE_MAX_JOBS = _env_int("PRECACHE_MAX_JOBS", 1000)
+
+# ---- fetch scheduler ----
+# Pages/requests in flight to listing sites across all requests in this process
+FETCH_GLOBAL_LIMIT = _env_int("FETCH_GLOBAL_LIMIT", 4)
+FETCH_PER_HOST_LIMIT = _env_int("FETCH_PER_HOST_LIMIT", 3)
+# Responses slower than this (or 429/5xx) make the host back off
+FETCH_SLOW_SECONDS = _env_int("FETCH_SLOW_SECONDS", 10)
+FETCH_BACKOFF_MAX_SECONDS = _env_int("FETCH_BACKOFF_MAX_SECONDS", 30)
+
+# ---- financing ----
+# Down payment:interest rate (% p.a., flat) pairs behind the *_dp_monthly
+# fields, in field order (zero_dp_monthly ... fiftyk_dp_monthly). Applied
+# when listings are read, so changing them needs no cache invalidation.
+FINANCE_RATES = _env_pairs("FINANCE_RATES", "0:4.98,10000:4.0,20000:3.5,30000:3.5,40000:3.0,50000:3.0")
+# One pair per *_dp_monthly field (app.utils.finance.MONTHLY_FIELDS)
+FINANCE_RATE_PAIRS = 6
+if len(FINANCE_RATES) != FINANCE_RATE_PAIRS:
+    raise ValueError(f"FINANCE_RATES needs {FINANCE_RATE_PAIRS} down payment:rate pairs, got {len(FINANCE_RATES)}")
+# Largest listings x loan terms x down payments x rates grid /api/finance computes
+FINANCE_MAX_GRID_CELLS = _env_int("FINANCE_MAX_GRID_CELLS", 200000)
+
+# ---- metrics ----
+# Prometheus counters and histograms served at GET /metrics; when off,
+# every instrumentation call returns immediately
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
@@ -0,0 +1,167 @@
+import bisect
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from app.core.config import METRICS_ENABLED
+
+# Every metric is labelled with the endpoint and role of the request it was
+# recorded for; work outside a request (precache queue, log writer) keeps
+# the defaults
+LABEL_NAMES = ("endpoint", "role")
+request_labels: ContextVar[tuple[str, str]] = ContextVar("request_labels", default=("background", "none"))
+
+# Upper bounds (seconds) of the stage histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def set_request_labels(endpoint: str | None = None, role: str | None = None):
+    """Labels metrics recorded from here on in this task (and tasks it starts)."""
+    if not METRICS_ENABLED:
+        return
+    current_endpoint, current_role = request_labels.get()
+    request_labels.set((endpoint or current_endpoint, role or current_role))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = (*LABEL_NAMES, *labels)
+        self._values: dict[tuple, object] = {}
+        self._lock = Lock()
+        registry.append(self)
+
+    def _render(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._render())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        """Adds `amount`; `labels` are the values of this metric's extra labels."""
+        if not METRICS_ENABLED:
+            return
+        key = request_labels.get() + labels
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render(self) -> list[str]:
+        return [
+            f"{self.name}_total{_format_labels(self.label_names, key)} {value}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        if not METRICS_ENABLED:
+            return
+        key = request_labels.get() + labels
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # per-bucket counts (the last is +Inf), sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    def time(self, *labels):
+        """Context manager that observes the time spent inside it."""
+        if not METRICS_ENABLED:
+            return _NOOP_TIMER
+        return _Timer(self, labels)
+
+    def _render(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+registry: list[_Metric] = []
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+# Metrics recorded across the app
+REQUESTS = Counter("carmetrics_requests", "API requests by response status.", ("status",))
+REQUEST_SECONDS = Histogram("carmetrics_request_seconds", "API request handling time.")
+STAGE_SECONDS = Histogram(
+    "carmetrics_stage_seconds",
+    "Time spent in each scraping stage: browser_launch, http_fetch, page_goto, "
+    "selector_wait, page_content, parse_listing, cache_get, cache_upsert, log_write.",
+    ("stage",),
+)
+STAGE_ERRORS = Counter("carmetrics_stage_errors", "Failures per scraping stage.", ("stage",))
+CACHE_LOOKUPS = Counter("carmetrics_cache_lookups", "Listing cache lookups by result (fresh, stale, miss).", ("result",))
+RATE_LIMIT_REJECTIONS = Counter("carmetrics_rate_limit_rejections", "Requests refused by the rate limiter.")
+LOG_ROWS_WRITTEN = Counter("carmetrics_log_rows_written", "api_logs rows written to SQLite.")
@@ -1,18 +1,132 @@
-import sqlite3
+from collections import Counter
 from datetime import datetime, timedelta, timezone
-import json
-from pathlib import Path
-import os
+from threading import Lock
+from typing import Union, get_args, get_origin
+import logging
 
-# Use mounted volume path in production, local path in development
-DATA_DIR = Path("/data") if os.getenv("DATABASE_PATH") else Path(__file__).resolve().parents[2] / "data"
+from app.core.config import DATA_DIR, MEMORY_CACHE_MAX_ENTRIES, CACHE_STALE_GRACE_HOURS
+from app.core.metrics import CACHE_LOOKUPS, STAGE_SECONDS
+from app.db import listing_codec
+from app.db.connection import connect
+from app.db.memory_cache import LRUTTLCache
+from app.models.car import CarListing
+from app.utils.finance import apply_financing
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = DATA_DIR / "cache.db"
 TTL_HOURS = 24 * 3 # 3 days
+# Stale rows are still served (and refreshed in the background) until this age
+MAX_STALE_HOURS = TTL_HOURS + CACHE_STALE_GRACE_HOURS
+
+# Decoded listings for hot URLs; served without touching SQLite
+memory_tier = LRUTTLCache(MEMORY_CACHE_MAX_ENTRIES, MAX_STALE_HOURS * 3600)
+
+# Cache hits not yet written to the listings table (url -> hits)
+_pending_access: Counter = Counter()
+_pending_access_lock = Lock()
+
+SQL_TYPES = {str: "TEXT", int: "INTEGER", float: "REAL"}
+
+
+def _sql_type(annotation):
+    """SQLite column type for a scalar field annotation, None for lists etc."""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        annotation = args[0] if len(args) == 1 else None
+    return SQL_TYPES.get(annotation)
+
+
+# Scalar CarListing fields get their own typed column (field -> SQL type);
+# the remaining fields (photos, missing_fields) are encoded into `data` by listing_codec
+LISTING_COLUMNS = {
+    name: sql_type
+    for name, field in CarListing.model_fields.items()
+    if name != "url" and (sql_type := _sql_type(field.annotation))
+}
+DATA_FIELDS = [name for name in CarListing.model_fields if name != "url" and name not in LISTING_COLUMNS]
+INDEXED_COLUMNS = ["model", "type", "vehicle_type", "price", "depreciation"]
+
+_column_list = ", ".join(f'"{name}"' for name in LISTING_COLUMNS)
+SELECT_LISTING_SQL = f"SELECT url, data, scraped_at, {_column_list} FROM listings"
+# Every write takes the next version; writers hold SQLite's write lock, so
+# versions are committed in increasing order (unlike scraped_at)
+NEXT_VERSION_SQL = "(SELECT COALESCE(MAX(version), 0) + 1 FROM listings)"
+UPSERT_LISTING_SQL = f"""
+INSERT INTO listings (url, data, scraped_at, {_column_list}, version)
+VALUES (?, ?, ?, {", ".join("?" * len(LISTING_COLUMNS))}, {NEXT_VERSION_SQL})
+ON CONFLICT(url) DO UPDATE SET
+    data = excluded.data,
+    -- A re-parsed snapshot may be older than the last (304 or unchanged) refresh
+    scraped_at = max(scraped_at, excluded.scraped_at),
+    version = excluded.version,
+    {", ".join(f'"{name}" = excluded."{name}"' for name in LISTING_COLUMNS)}
+"""
+MIGRATE_ROW_SQL = f"""
+UPDATE listings SET data = ?, {", ".join(f'"{name}" = ?' for name in LISTING_COLUMNS)},
+    version = {NEXT_VERSION_SQL}
+WHERE url = ?
+"""
+MIGRATE_BATCH_SIZE = 500
 
 def get_conn():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    return connect(DB_PATH)
+
+def _listing_params(listing: dict) -> tuple[str | bytes, list]:
+    """(encoded data, column values) for one listing dict."""
+    data = {name: listing[name] for name in DATA_FIELDS if name in listing}
+    return listing_codec.encode(data), [listing.get(name) for name in LISTING_COLUMNS]
+
+def _row_to_listing(row) -> dict:
+    """Rebuilds a listing dict (in CarListing field order) from a SELECT_LISTING_SQL row."""
+    url, data, _scraped_at, *values = row
+    fields = listing_codec.decode(data)
+    fields["url"] = url
+    fields.update(zip(LISTING_COLUMNS, values))
+    return {name: fields[name] for name in CarListing.model_fields if name in fields}
+
+def _migrate_json_rows(conn) -> int:
+    """
+    Moves the scalar fields of rows written before the typed columns
+    existed out of their JSON blob. Returns rows migrated.
+    """
+    migrated = 0
+    while True:
+        # model is required, so only unmigrated rows have it NULL
+        rows = conn.execute(
+            "SELECT url, data FROM listings WHERE model IS NULL LIMIT ?", (MIGRATE_BATCH_SIZE,)
+        ).fetchall()
+        if not rows:
+            return migrated
+        updates = []
+        for url, data in rows:
+            listing = listing_codec.decode(data)
+            # Never leave model NULL, or the row would be picked up again
+            if listing.get("model") is None:
+                listing["model"] = ""
+            data, values = _listing_params(listing)
+            updates.append((data, *values, url))
+        conn.executemany(MIGRATE_ROW_SQL, updates)
+        migrated += len(updates)
+
+def _reencode_data(conn) -> int:
+    """
+    Rewrites `data` values written by another codec (or as plain JSON
+    before codecs existed) with the configured one. Returns rows rewritten.
+    """
+    where, params = listing_codec.stale_data_sql()
+    reencoded = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT url, data FROM listings WHERE {where} LIMIT ?", (*params, MIGRATE_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return reencoded
+        conn.executemany(
+            "UPDATE listings SET data = ? WHERE url = ?",
+            [(listing_codec.encode(listing_codec.decode(data)), url) for url, data in rows],
+        )
+        reencoded += len(rows)
 
 def init_cache_db():
     with get_conn() as conn:
@@ -23,35 +137,297 @@ def init_cache_db():
             scraped_at TEXT NOT NULL
         )
         """)
-        
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(listings)")}
+        if "hits" not in columns:
+            conn.execute("ALTER TABLE listings ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+        if "last_accessed" not in columns:
+            conn.execute("ALTER TABLE listings ADD COLUMN last_accessed TEXT")
+        for name, sql_type in LISTING_COLUMNS.items():
+            if name not in columns:
+                conn.execute(f'ALTER TABLE listings ADD COLUMN "{name}" {sql_type}')
+        if "version" not in columns:
+            conn.execute("ALTER TABLE listings ADD COLUMN version INTEGER")
+            conn.execute("UPDATE listings SET version = rowid")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_scraped_at ON listings (scraped_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_version ON listings (version)")
+        for name in INDEXED_COLUMNS:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_listings_{name} ON listings ("{name}")')
+        # What the last fetch of each listing looked like, for change detection
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS listing_validators (
+            url TEXT PRIMARY KEY,
+            fingerprint TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            checked_at TEXT NOT NULL,
+            parser_version TEXT
+        ) WITHOUT ROWID
+        """)
+        validator_columns = {row[1] for row in conn.execute("PRAGMA table_info(listing_validators)")}
+        if "parser_version" not in validator_columns:
+            conn.execute("ALTER TABLE listing_validators ADD COLUMN parser_version TEXT")
+        # One row per price/depreciation change (and the first sighting)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS listing_history (
+            url TEXT NOT NULL,
+            changed_at TEXT NOT NULL,
+            old_price REAL,
+            new_price REAL,
+            old_depreciation REAL,
+            new_depreciation REAL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_listing_history_url ON listing_history (url, changed_at)")
+        migrated = _migrate_json_rows(conn)
+        reencoded = _reencode_data(conn)
+    if migrated:
+        logger.info(f"[CACHE] Moved {migrated} listing(s) from JSON into typed columns")
+    if reencoded:
+        logger.info(f"[CACHE] Re-encoded {reencoded} listing(s) with {listing_codec.CODEC}")
+
+# SQLite's default limit on host parameters per statement is 999
+MAX_PARAMS_PER_QUERY = 900
+
 def get_cached_listing(url: str):
-    with get_conn() as conn:
-        row = conn.execute(
-            "SELECT data, scraped_at FROM listings WHERE url = ?",
-            (url,)
-        ).fetchone()
+    return get_cached_listings([url]).get(url)
 
-    if not row:
-        return None
+def get_cached_listings(urls: list[str]) -> dict[str, dict]:
+    """
+    Looks up many URLs at once. Returns {url: listing_dict} for fresh hits
+    only; misses, stale and expired rows are left out.
+    """
+    found, stale = lookup_listings(urls)
+    return {url: listing for url, listing in found.items() if url not in stale}
 
-    data_json, scraped_at = row
-    scraped_time = datetime.fromisoformat(scraped_at)
+def lookup_listings(urls: list[str]) -> tuple[dict[str, dict], set[str]]:
+    """
+    Stale-while-revalidate lookup. Returns ({url: listing_dict}, stale_urls):
+    rows younger than TTL_HOURS are fresh, rows up to MAX_STALE_HOURS old are
+    returned too but listed in stale_urls so the caller can refresh them.
+    Every hit counts towards the listing's access stats. Monthly instalments
+    are recomputed from the current FINANCE_RATES.
+    """
+    with STAGE_SECONDS.time("cache_get"):
+        found, stale = _lookup_listings(urls)
+    unique = len(set(urls))
+    CACHE_LOOKUPS.inc("fresh", amount=len(found) - len(stale))
+    CACHE_LOOKUPS.inc("stale", amount=len(stale))
+    CACHE_LOOKUPS.inc("miss", amount=unique - len(found))
+    return found, stale
 
-    if datetime.now(timezone.utc) - scraped_time > timedelta(hours=TTL_HOURS):
-        return None
+def _lookup_listings(urls: list[str]) -> tuple[dict[str, dict], set[str]]:
+    now = datetime.now(timezone.utc)
+    fresh_after = (now - timedelta(hours=TTL_HOURS)).timestamp()
+    found = {}
+    stale = set()
+    missing = []
+    for url in dict.fromkeys(urls):
+        cached = memory_tier.get_entry(url)
+        if cached is not None:
+            listing_dict, stored_at = cached
+            found[url] = dict(listing_dict)
+            if stored_at < fresh_after:
+                stale.add(url)
+        else:
+            missing.append(url)
 
-    return json.loads(data_json)
+    if missing:
+        rows = []
+        with get_conn() as conn:
+            for i in range(0, len(missing), MAX_PARAMS_PER_QUERY):
+                chunk = missing[i:i + MAX_PARAMS_PER_QUERY]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(conn.execute(
+                    f"{SELECT_LISTING_SQL} WHERE url IN ({placeholders})",
+                    chunk
+                ).fetchall())
 
-def upsert_listing(url: str, listing_dict: dict):
+        for row in rows:
+            url, scraped_at = row[0], row[2]
+            scraped_time = datetime.fromisoformat(scraped_at)
+            if now - scraped_time > timedelta(hours=MAX_STALE_HOURS):
+                continue
+
+            listing_dict = _row_to_listing(row)
+            memory_tier.put(url, listing_dict, scraped_time.timestamp())
+            found[url] = dict(listing_dict)
+            if scraped_time.timestamp() < fresh_after:
+                stale.add(url)
+
+    apply_financing(list(found.values()))
+    record_access(list(found))
+    return found, stale
+
+def record_access(urls: list[str]):
+    """Counts cache hits in memory; flush_access_counts() writes them out."""
+    with _pending_access_lock:
+        _pending_access.update(urls)
+
+def flush_access_counts() -> int:
+    """Adds the pending hit counts to the listings table. Returns URLs updated."""
+    with _pending_access_lock:
+        pending = dict(_pending_access)
+        _pending_access.clear()
+    if not pending:
+        return 0
+
+    accessed_at = datetime.now(timezone.utc).isoformat()
+    with get_conn() as conn:
+        conn.executemany(
+            "UPDATE listings SET hits = hits + ?, last_accessed = ? WHERE url = ?",
+            [(hits, accessed_at, url) for url, hits in pending.items()]
+        )
+    return len(pending)
+
+def get_refresh_candidates(ahead_hours: float, min_hits: int, limit: int, accessed_within_hours: float) -> list[str]:
+    """
+    Most-requested listings that expire within `ahead_hours` (or already
+    have, but are still inside the stale grace window), by hits descending.
+    Only listings read within the last `accessed_within_hours` qualify.
+    """
+    now = datetime.now(timezone.utc)
+    expires_before = (now - timedelta(hours=TTL_HOURS - ahead_hours)).isoformat()
+    still_served_after = (now - timedelta(hours=MAX_STALE_HOURS)).isoformat()
+    accessed_after = (now - timedelta(hours=accessed_within_hours)).isoformat()
+    with get_conn() as conn:
+        rows = conn.execute("""
+        SELECT url FROM listings
+        WHERE scraped_at < ? AND scraped_at >= ? AND hits >= ? AND last_accessed >= ?
+        ORDER BY hits DESC
+        LIMIT ?
+        """, (expires_before, still_served_after, min_hits, accessed_after, limit)).fetchall()
+    return [url for (url,) in rows]
+
+def get_previous_scrape(url: str) -> tuple[dict, dict] | None:
+    """
+    (validators, listing_dict) from the last time url was scraped, or None
+    when there is no stored listing to fall back on. validators holds
+    fingerprint, etag, last_modified and the parser_version of the stored
+    listing.
+    """
+    with get_conn() as conn:
+        validators = conn.execute(
+            "SELECT fingerprint, etag, last_modified, parser_version FROM listing_validators WHERE url = ?", (url,)
+        ).fetchone()
+        if validators is None:
+            return None
+        row = conn.execute(f"{SELECT_LISTING_SQL} WHERE url = ?", (url,)).fetchone()
+    if row is None:
+        return None
+    fingerprint, etag, last_modified, parser_version = validators
+    listing = _row_to_listing(row)
+    apply_financing([listing])
+    return {
+        "fingerprint": fingerprint,
+        "etag": etag,
+        "last_modified": last_modified,
+        "parser_version": parser_version,
+    }, listing
+
+def save_validators(url: str, fingerprint: str | None, etag: str | None, last_modified: str | None, parser_version: str):
     with get_conn() as conn:
         conn.execute("""
-        INSERT INTO listings (url, data, scraped_at)
-        VALUES (?, ?, ?)
+        INSERT INTO listing_validators (url, fingerprint, etag, last_modified, checked_at, parser_version)
+        VALUES (?, ?, ?, ?, ?, ?)
         ON CONFLICT(url) DO UPDATE SET
-            data = excluded.data,
-            scraped_at = excluded.scraped_at
-        """, (
-            url,
-            json.dumps(listing_dict),
-            datetime.now(timezone.utc).isoformat()
-        ))
\ No newline at end of file
+            fingerprint = excluded.fingerprint,
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            checked_at = excluded.checked_at,
+            parser_version = excluded.parser_version
+        """, (url, fingerprint, etag, last_modified, datetime.now(timezone.utc).isoformat(), parser_version))
+
+def save_reparsed_fingerprints(fingerprints: dict[str, str | None], parser_version: str):
+    """
+    Stores the fingerprint a reparse computed for each URL under
+    parser_version. The stored etag and last_modified are kept: the page
+    has not changed, so a conditional request still applies.
+    """
+    if not fingerprints:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    with get_conn() as conn:
+        conn.executemany("""
+        INSERT INTO listing_validators (url, fingerprint, etag, last_modified, checked_at, parser_version)
+        VALUES (?, ?, NULL, NULL, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            fingerprint = excluded.fingerprint,
+            parser_version = excluded.parser_version
+        """, [(url, fingerprint, now, parser_version) for url, fingerprint in fingerprints.items()])
+
+def _record_history(conn, rows: list[tuple]):
+    """Adds a listing_history row for each upserted listing whose price or depreciation moved."""
+    urls = [row[0] for row in rows]
+    previous = {}
+    for i in range(0, len(urls), MAX_PARAMS_PER_QUERY):
+        chunk = urls[i:i + MAX_PARAMS_PER_QUERY]
+        previous.update(
+            (url, (price, depreciation))
+            for url, price, depreciation in conn.execute(
+                f"SELECT url, price, depreciation FROM listings WHERE url IN ({','.join('?' * len(chunk))})", chunk
+            )
+        )
+
+    changes = []
+    for url, scraped_at, price, depreciation in rows:
+        old_price, old_depreciation = previous.get(url, (None, None))
+        if url not in previous or (old_price, old_depreciation) != (price, depreciation):
+            changes.append((url, scraped_at, old_price, price, old_depreciation, depreciation))
+    conn.executemany("INSERT INTO listing_history VALUES (?, ?, ?, ?, ?, ?)", changes)
+
+def get_listing_history(url: str, limit: int = 100) -> list[dict]:
+    """Price/depreciation changes for url, oldest first (the last `limit`)."""
+    with get_conn() as conn:
+        rows = conn.execute("""
+        SELECT changed_at, old_price, new_price, old_depreciation, new_depreciation
+        FROM listing_history WHERE url = ?
+        ORDER BY changed_at DESC LIMIT ?
+        """, (url, limit)).fetchall()
+    return [
+        {
+            "changed_at": changed_at,
+            "old_price": old_price,
+            "price": price,
+            "old_depreciation": old_depreciation,
+            "depreciation": depreciation,
+        }
+        for changed_at, old_price, price, old_depreciation, depreciation in reversed(rows)
+    ]
+
+def upsert_listing(url: str, listing_dict: dict):
+    upsert_listings([{**listing_dict, "url": url}])
+
+def upsert_listings(listings: list[dict], fetched_at: dict[str, datetime] | None = None, record_history: bool = True):
+    """
+    Stores many listing dicts (keyed by their "url") in one transaction.
+    `fetched_at` maps URLs to when their page was fetched, for listings
+    re-parsed from a snapshot; the rest are stamped with the current time.
+    A listing's scraped_at never moves backwards. Price and depreciation
+    changes are added to listing_history unless `record_history` is False
+    (a reparse: the page did not change, only the parser did).
+    """
+    listings = [listing for listing in listings if listing and listing.get("url")]
+    if not listings:
+        return
+
+    now = datetime.now(timezone.utc)
+    fetched_at = fetched_at or {}
+    scraped_at = {listing["url"]: fetched_at.get(listing["url"], now) for listing in listings}
+    with STAGE_SECONDS.time("cache_upsert"), get_conn() as conn:
+        rows = []
+        for listing in listings:
+            data, values = _listing_params(listing)
+            rows.append((listing["url"], data, scraped_at[listing["url"]].isoformat(), *values))
+        if record_history:
+            _record_history(conn, [
+                (listing["url"], scraped_at[listing["url"]].isoformat(), listing.get("price"), listing.get("depreciation"))
+                for listing in listings
+            ])
+        conn.executemany(UPSERT_LISTING_SQL, rows)
+
+    for listing in listings:
+        if listing["url"] in fetched_at:
+            # Its stored scraped_at may be later than fetched_at; re-read it from SQLite
+            memory_tier.discard(listing["url"])
+        else:
+            memory_tier.put(listing["url"], listing, scraped_at[listing["url"]].timestamp())
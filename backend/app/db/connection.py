@@ -0,0 +1,69 @@
+import asyncio
+import contextvars
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from app.core.config import DB_WORKERS, DB_BUSY_TIMEOUT_MS, DB_MMAP_SIZE
+
+# Statements kept prepared per connection (sqlite3 reuses them by SQL text)
+STATEMENT_CACHE_SIZE = 256
+
+# (thread id, database path) -> connection
+_connections: dict[tuple[int, Path], sqlite3.Connection] = {}
+_connections_lock = threading.Lock()
+
+# DB work is funnelled through a few threads, so each keeps one
+# connection per database open for the life of the process
+_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+
+
+def _open(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,  # only so close_all() can run from another thread
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """
+    Returns this thread's connection to `path`, opening it on first use.
+    Use it as `with connect(path) as conn:` for a transaction; do not close it.
+    """
+    key = (threading.get_ident(), Path(path))
+    conn = _connections.get(key)
+    if conn is None:
+        conn = _open(key[1])
+        with _connections_lock:
+            _connections[key] = conn
+    return conn
+
+
+async def run_db(fn, *args, **kwargs):
+    """Runs blocking DB work on the DB thread pool instead of the event loop."""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context (metrics labels) into the DB thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, partial(context.run, fn, *args, **kwargs))
+
+
+def close_all():
+    """Closes every pooled connection. Call on shutdown."""
+    with _connections_lock:
+        for conn in _connections.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
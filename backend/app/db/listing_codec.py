@@ -0,0 +1,69 @@
+"""
+Encoding of the listings `data` column (the CarListing fields without a
+typed column). Binary values start with a format byte naming the codec
+that wrote them; text values are plain JSON, as every row was before
+this module existed, so rows of any codec can be read back.
+"""
+import json
+import logging
+
+from app.core.config import LISTING_CODEC
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Format byte per binary codec; never reuse a retired value
+FORMAT_BYTES = {"orjson": 1, "msgpack": 2}
+
+
+def _pick_codec(name: str) -> str:
+    if name == "auto":
+        return "orjson" if orjson is not None else "json"
+    if name != "json" and name not in FORMAT_BYTES:
+        raise ValueError(f"Unknown listing codec {name!r}, expected auto, orjson, msgpack or json")
+    if (name == "orjson" and orjson is None) or (name == "msgpack" and msgpack is None):
+        logger.warning(f"[CACHE] {name} is not installed, storing listing data as JSON")
+        return "json"
+    return name
+
+
+CODEC = _pick_codec(LISTING_CODEC)
+
+
+def encode(value: dict, codec: str | None = None) -> str | bytes:
+    codec = codec or CODEC
+    if codec == "orjson":
+        return bytes((FORMAT_BYTES["orjson"],)) + orjson.dumps(value)
+    if codec == "msgpack":
+        return bytes((FORMAT_BYTES["msgpack"],)) + msgpack.packb(value)
+    return json.dumps(value)
+
+
+def decode(data: str | bytes) -> dict:
+    if isinstance(data, str):
+        return json.loads(data)
+    if data[0] == FORMAT_BYTES["orjson"]:
+        # Still JSON, so readable without orjson
+        return orjson.loads(data[1:]) if orjson is not None else json.loads(data[1:])
+    if data[0] == FORMAT_BYTES["msgpack"]:
+        if msgpack is None:
+            raise RuntimeError("listing data is msgpack-encoded but msgpack is not installed")
+        return msgpack.unpackb(data[1:])
+    raise ValueError(f"Unknown listing data format byte {data[0]}")
+
+
+def stale_data_sql(codec: str | None = None) -> tuple[str, tuple]:
+    """WHERE clause (and its parameters) matching `data` values not written by `codec`."""
+    codec = codec or CODEC
+    if codec == "json":
+        return "typeof(data) != 'text'", ()
+    return "typeof(data) != 'blob' OR substr(data, 1, 1) != ?", (bytes((FORMAT_BYTES[codec],)),)
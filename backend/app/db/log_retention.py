@@ -1,65 +1,151 @@
-import sqlite3
+import asyncio
 import csv
 import gzip
+import logging
 import os
+import threading
 from datetime import datetime, timezone
-from pathlib import Path
 
-DATA_DIR = Path("/data") if os.getenv("DATABASE_PATH") else Path(__file__).resolve().parents[2] / "data"
+from app.core.config import DATA_DIR, LOG_ARCHIVE_DELAY_SECONDS, LOG_ARCHIVE_CHUNK_ROWS
+from app.db.connection import connect, run_db
+
+logger = logging.getLogger(__name__)
+
 DB_PATH = DATA_DIR / "logging.db"
 ARCHIVE_DIR = DATA_DIR / "archives"
+ARCHIVE_INTERVAL_SECONDS = 24 * 3600
+# VACUUM after archiving once at least this share of the file is free pages
+VACUUM_FREE_RATIO = 0.5
+
+
+class ArchiveStopped(Exception):
+    pass
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12}-{mon % 12 + 1:02d}"
 
-def archive_completed_months():
+
+def _completed_months(cur, current_month: str) -> list[str]:
+    """'YYYY-MM' months before current_month that still have rows, via the timestamp index."""
+    (oldest,) = cur.execute("SELECT MIN(timestamp) FROM api_logs").fetchone()
+    months = []
+    month = oldest[:7] if oldest else current_month
+    while month < current_month:
+        next_month = _next_month(month)
+        if cur.execute(
+            "SELECT 1 FROM api_logs WHERE timestamp >= ? AND timestamp < ? LIMIT 1", (month, next_month)
+        ).fetchone():
+            months.append(month)
+        month = next_month
+    return months
+
+
+def _export_month(conn, month: str, archive_path, stop) -> int:
     """
-    Archives all completed calendar months into compressed CSV files
-    and removes them from logging.db. Keeps the current month live.
+    Streams one month into archive_path via a .partial file that is only
+    renamed once complete. Returns rows written.
     """
+    partial_path = archive_path.with_name(archive_path.name + ".partial")
+    cur = conn.execute(
+        "SELECT * FROM api_logs WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+        (month, _next_month(month)),
+    )
+    columns = [desc[0] for desc in cur.description]
+    written = 0
+    try:
+        with gzip.open(partial_path, "wt", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            while rows := cur.fetchmany(LOG_ARCHIVE_CHUNK_ROWS):
+                if stop is not None and stop.is_set():
+                    raise ArchiveStopped()
+                writer.writerows(rows)
+                written += len(rows)
+    finally:
+        cur.close()
+    os.replace(partial_path, archive_path)
+    return written
 
-    ARCHIVE_DIR.mkdir(exist_ok=True)
 
-    now = datetime.now(timezone.utc)
-    current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+def _delete_month(conn, month: str, stop) -> int:
+    """Deletes one month in chunks so the log writer is never blocked for long."""
+    deleted = 0
+    while True:
+        if stop is not None and stop.is_set():
+            raise ArchiveStopped()
+        with conn:
+            count = conn.execute("""
+                DELETE FROM api_logs WHERE id IN (
+                    SELECT id FROM api_logs
+                    WHERE timestamp >= ? AND timestamp < ?
+                    LIMIT ?
+                )
+            """, (month, _next_month(month), LOG_ARCHIVE_CHUNK_ROWS)).rowcount
+        deleted += count
+        if count < LOG_ARCHIVE_CHUNK_ROWS:
+            return deleted
 
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
 
-    # Find months that have data but are fully completed
-    rows = cur.execute("""
-        SELECT DISTINCT substr(timestamp, 1, 7) AS month
-        FROM api_logs
-        WHERE timestamp < ?
-        ORDER BY month
-    """, (current_month_start.isoformat(),)).fetchall()
+def archive_completed_months(stop: threading.Event | None = None) -> int:
+    """
+    Archives all completed calendar months into compressed CSV files
+    and removes them from logging.db. Keeps the current month live.
 
-    for (month,) in rows:
-        # month is 'YYYY-MM'
-        archive_path = ARCHIVE_DIR / f"api_logs_{month}.csv.gz"
+    Safe to interrupt (set `stop`) and re-run: a month is only deleted once
+    its archive has been fully written and renamed into place, and a month
+    whose archive already exists only has its leftover rows deleted.
+    Returns the number of rows archived.
+    """
 
-        # Fetch all logs for that month
-        data = cur.execute("""
-            SELECT *
-            FROM api_logs
-            WHERE substr(timestamp, 1, 7) = ?
-        """, (month,)).fetchall()
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
 
-        if not data:
-            continue
+    current_month = datetime.now(timezone.utc).strftime("%Y-%m")
+    conn = connect(DB_PATH)
 
-        # Column names
-        columns = [desc[0] for desc in cur.description]
+    archived = 0
+    for month in _completed_months(conn.cursor(), current_month):
+        archive_path = ARCHIVE_DIR / f"api_logs_{month}.csv.gz"
 
-        # Write compressed CSV
-        with gzip.open(archive_path, "wt", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(columns)
-            writer.writerows(data)
+        if archive_path.exists():
+            # Exported by an earlier run that stopped before deleting
+            logger.info(f"[LOGS] {archive_path.name} exists, deleting leftover rows")
+        else:
+            written = _export_month(conn, month, archive_path, stop)
+            archived += written
+            logger.info(f"[LOGS] Archived {written} rows to {archive_path.name}")
 
-        # Delete archived rows
-        cur.execute("""
-            DELETE FROM api_logs
-            WHERE substr(timestamp, 1, 7) = ?
-        """, (month,))
+        _delete_month(conn, month, stop)
 
-        conn.commit()
+    if archived:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        (pages,) = conn.execute("PRAGMA page_count").fetchone()
+        (free_pages,) = conn.execute("PRAGMA freelist_count").fetchone()
+        if pages and free_pages / pages >= VACUUM_FREE_RATIO:
+            conn.execute("VACUUM")
+            logger.info(f"[LOGS] Vacuumed logging.db ({free_pages}/{pages} pages were free)")
+    return archived
 
-    conn.close()
+
+async def archive_in_background(stop: threading.Event, delay_seconds: float = LOG_ARCHIVE_DELAY_SECONDS):
+    """
+    Runs archive_completed_months off the startup path, then once a day.
+    To shut down, set `stop` and cancel the task: a run in progress
+    finishes its current chunk first.
+    """
+    await asyncio.sleep(delay_seconds)
+    while not stop.is_set():
+        run = asyncio.ensure_future(run_db(archive_completed_months, stop))
+        try:
+            await asyncio.shield(run)
+        except asyncio.CancelledError:
+            stop.set()
+            await asyncio.gather(run, return_exceptions=True)
+            raise
+        except ArchiveStopped:
+            logger.info("[LOGS] Archiving stopped, will resume on next run")
+            return
+        except Exception as e:
+            logger.error(f"[LOGS] Archiving failed: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,223 @@
+import bisect
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the process_time histogram buckets: 5ms to
+# ~2min, each 25% wider than the last, so percentile estimates stay within
+# a bucket's width. The last bucket catches everything slower.
+LATENCY_BUCKETS = [round(0.005 * 1.25 ** i, 4) for i in range(46)]
+
+# Rows read per step when rebuilding the rollups from api_logs
+REBUILD_BATCH_SIZE = 5000
+
+ROLLUP_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS api_log_minutes (
+        minute TEXT NOT NULL,           -- 'YYYY-MM-DDTHH:MM' (UTC)
+        endpoint TEXT NOT NULL,
+        requests INTEGER NOT NULL,
+        errors INTEGER NOT NULL,        -- status >= 400
+        server_errors INTEGER NOT NULL, -- status >= 500
+        url_count INTEGER NOT NULL,
+        cache_hits INTEGER NOT NULL,
+        total_time REAL NOT NULL,
+        max_time REAL NOT NULL,
+        PRIMARY KEY (minute, endpoint)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS api_log_latency (
+        minute TEXT NOT NULL,
+        endpoint TEXT NOT NULL,
+        bucket INTEGER NOT NULL,        -- index into LATENCY_BUCKETS
+        count INTEGER NOT NULL,
+        PRIMARY KEY (minute, endpoint, bucket)
+    ) WITHOUT ROWID
+    """,
+]
+
+UPSERT_MINUTE_SQL = """
+INSERT INTO api_log_minutes (minute, endpoint, requests, errors, server_errors, url_count, cache_hits, total_time, max_time)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(minute, endpoint) DO UPDATE SET
+    requests = requests + excluded.requests,
+    errors = errors + excluded.errors,
+    server_errors = server_errors + excluded.server_errors,
+    url_count = url_count + excluded.url_count,
+    cache_hits = cache_hits + excluded.cache_hits,
+    total_time = total_time + excluded.total_time,
+    max_time = max(max_time, excluded.max_time)
+"""
+
+UPSERT_LATENCY_SQL = """
+INSERT INTO api_log_latency (minute, endpoint, bucket, count)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(minute, endpoint, bucket) DO UPDATE SET
+    count = count + excluded.count
+"""
+
+
+def init_rollups(conn):
+    """Creates the rollup tables; fills them from api_logs the first time."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'api_log_minutes'"
+    ).fetchone()
+    for statement in ROLLUP_SCHEMA:
+        conn.execute(statement)
+    if not exists:
+        rebuilt = rebuild_rollups(conn)
+        if rebuilt:
+            logger.info(f"[LOGS] Built rollups from {rebuilt} existing log rows")
+
+
+def rebuild_rollups(conn) -> int:
+    """Recomputes the rollups from every row in api_logs. Returns rows read."""
+    conn.execute("DELETE FROM api_log_minutes")
+    conn.execute("DELETE FROM api_log_latency")
+    cur = conn.execute(
+        "SELECT timestamp, endpoint, url_count, process_time, status_code, cache_hits FROM api_logs"
+    )
+    total = 0
+    while rows := cur.fetchmany(REBUILD_BATCH_SIZE):
+        _apply(conn, rows)
+        total += len(rows)
+    return total
+
+
+def update_rollups(conn, log_rows: list[tuple]):
+    """
+    Adds freshly inserted api_logs rows (in INSERT_LOG_SQL parameter order)
+    to the rollups. Runs in the same transaction as the insert.
+    """
+    _apply(conn, [
+        (timestamp, endpoint, url_count, process_time, status_code, cache_hits)
+        for timestamp, endpoint, _role, url_count, process_time, status_code, _text, _ip, _id, cache_hits in log_rows
+    ])
+
+
+def _apply(conn, rows):
+    minutes: dict[tuple, list] = {}
+    latency: dict[tuple, int] = {}
+    for timestamp, endpoint, url_count, process_time, status_code, cache_hits in rows:
+        key = (timestamp[:16], endpoint)
+        totals = minutes.get(key)
+        if totals is None:
+            totals = minutes[key] = [0, 0, 0, 0, 0, 0.0, 0.0]
+        process_time = process_time or 0.0
+        status_code = status_code or 0
+        totals[0] += 1
+        totals[1] += status_code >= 400
+        totals[2] += status_code >= 500
+        totals[3] += url_count or 0
+        totals[4] += cache_hits or 0
+        totals[5] += process_time
+        totals[6] = max(totals[6], process_time)
+
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, process_time)
+        latency[key + (bucket,)] = latency.get(key + (bucket,), 0) + 1
+
+    conn.executemany(UPSERT_MINUTE_SQL, [(*key, *totals) for key, totals in minutes.items()])
+    conn.executemany(UPSERT_LATENCY_SQL, [(*key, count) for key, count in latency.items()])
+
+
+def _percentile(counts: list[int], q: float, max_time: float) -> float | None:
+    """Estimates a percentile from bucket counts, interpolating inside the bucket."""
+    total = sum(counts)
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for bucket, count in enumerate(counts):
+        if count and seen + count >= target:
+            lower = LATENCY_BUCKETS[bucket - 1] if bucket else 0.0
+            upper = LATENCY_BUCKETS[bucket] if bucket < len(LATENCY_BUCKETS) else max_time
+            upper = min(upper, max_time)
+            lower = min(lower, upper)
+            return round(lower + (upper - lower) * (target - seen) / count, 4)
+        seen += count
+    return round(max_time, 4)
+
+
+def _time_range(start: datetime | None, end: datetime | None) -> tuple[str, str]:
+    """ISO UTC bounds; naive datetimes are taken as UTC, the default is the last 24 hours."""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=24)
+    return tuple(
+        (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).astimezone(timezone.utc).isoformat()
+        for dt in (start, end)
+    )
+
+
+def traffic_summary(conn, start: datetime | None = None, end: datetime | None = None, endpoint: str | None = None) -> list[dict]:
+    """
+    Per-endpoint request counts, error rates, cache-hit ratio and latency
+    percentiles between start and end (default: the last 24 hours), read
+    from the per-minute rollups.
+    """
+    first, last = (bound[:16] for bound in _time_range(start, end))
+    where = "minute BETWEEN ? AND ?" + (" AND endpoint = ?" if endpoint else "")
+    params = (first, last, endpoint) if endpoint else (first, last)
+
+    totals = conn.execute(f"""
+        SELECT endpoint, SUM(requests), SUM(errors), SUM(server_errors),
+               SUM(url_count), SUM(cache_hits), SUM(total_time), MAX(max_time)
+        FROM api_log_minutes
+        WHERE {where}
+        GROUP BY endpoint
+    """, params).fetchall()
+
+    histograms: dict[str, list[int]] = {}
+    for name, bucket, count in conn.execute(f"""
+        SELECT endpoint, bucket, SUM(count)
+        FROM api_log_latency
+        WHERE {where}
+        GROUP BY endpoint, bucket
+    """, params):
+        histogram = histograms.setdefault(name, [0] * (len(LATENCY_BUCKETS) + 1))
+        histogram[bucket] = count
+
+    summary = []
+    for name, requests, errors, server_errors, url_count, cache_hits, total_time, max_time in totals:
+        histogram = histograms.get(name, [])
+        summary.append({
+            "endpoint": name,
+            "requests": requests,
+            "error_rate": round(errors / requests, 4),
+            "server_error_rate": round(server_errors / requests, 4),
+            "cache_hit_ratio": round(cache_hits / url_count, 4) if url_count else None,
+            "avg_process_time": round(total_time / requests, 4),
+            "p50_process_time": _percentile(histogram, 0.50, max_time),
+            "p95_process_time": _percentile(histogram, 0.95, max_time),
+            "p99_process_time": _percentile(histogram, 0.99, max_time),
+            "max_process_time": round(max_time, 4),
+        })
+    summary.sort(key=lambda row: -row["requests"])
+    return summary
+
+
+def top_ips(conn, start: datetime | None = None, end: datetime | None = None, endpoint: str | None = None, limit: int = 20) -> list[dict]:
+    """
+    Busiest client IPs between start and end (default: the last 24 hours).
+    Reads the live api_logs table through its (endpoint, timestamp) or
+    timestamp index, so it covers the current month only.
+    """
+    params = list(_time_range(start, end))
+    where = "timestamp BETWEEN ? AND ?"
+    if endpoint:
+        where = "endpoint = ? AND " + where
+        params.insert(0, endpoint)
+
+    rows = conn.execute(f"""
+        SELECT ip_address, COUNT(*), SUM(status_code >= 400), SUM(url_count)
+        FROM api_logs
+        WHERE {where}
+        GROUP BY ip_address
+        ORDER BY COUNT(*) DESC
+        LIMIT ?
+    """, (*params, limit)).fetchall()
+    return [
+        {"ip_address": ip, "requests": requests, "errors": errors, "url_count": url_count or 0}
+        for ip, requests, errors, url_count in rows
+    ]
@@ -1,19 +1,20 @@
-import sqlite3
-import os
+import asyncio
+import logging
+from collections import deque
 from datetime import datetime, timezone
-from pathlib import Path
 
-# Use mounted volume path in production, local path in development
-DATA_DIR = Path(os.getenv("DATABASE_PATH", Path(__file__).resolve().parents[2] / "data")).parent
-if os.getenv("DATABASE_PATH"):
-    DATA_DIR = Path("/data")
+from app.core.config import DATA_DIR, LOG_QUEUE_MAX, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL_MS
+from app.core.metrics import LOG_ROWS_WRITTEN, STAGE_SECONDS
+from app.db.connection import connect, run_db
+from app.db.log_rollups import init_rollups, update_rollups
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = DATA_DIR / "logging.db"
 ARCHIVE_DIR = DATA_DIR / "archives"
 
 def get_conn():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    return connect(DB_PATH)
 
 def init_logging_db():
     with get_conn() as conn:
@@ -31,6 +32,115 @@ def init_logging_db():
             status_text TEXT
         );
         """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(api_logs)")}
+        if "cache_hits" not in columns:
+            conn.execute("ALTER TABLE api_logs ADD COLUMN cache_hits INTEGER")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_api_logs_timestamp ON api_logs (timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_api_logs_endpoint_timestamp ON api_logs (endpoint, timestamp)")
+        init_rollups(conn)
+
+INSERT_LOG_SQL = """
+INSERT INTO api_logs (
+    timestamp,
+    endpoint,
+    userrole,
+    url_count,
+    process_time,
+    status_code,
+    status_text,
+    ip_address,
+    request_id,
+    cache_hits
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+def write_log_rows(rows: list[tuple]):
+    """Inserts rows and adds them to the per-minute rollups in one transaction."""
+    with STAGE_SECONDS.time("log_write"), get_conn() as conn:
+        conn.executemany(INSERT_LOG_SQL, rows)
+        update_rollups(conn, rows)
+    LOG_ROWS_WRITTEN.inc(amount=len(rows))
+
+
+class LogWriter:
+    """
+    Buffers api_logs rows in memory and writes them in batches from a
+    background task, so logging never waits on SQLite. Rows are dropped
+    (and counted) when the queue is full.
+    """
+
+    def __init__(self, max_queue: int = LOG_QUEUE_MAX, batch_size: int = LOG_BATCH_SIZE, flush_interval_ms: int = LOG_FLUSH_INTERVAL_MS):
+        self.max_queue = max_queue
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: deque = deque()
+        self._wakeup = None
+        self._task = None
+        self._stats = {"enqueued": 0, "written": 0, "dropped": 0, "batches": 0, "write_errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background task and flushes whatever is still queued."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        while self._queue:
+            await self._flush()
+
+    def submit(self, row: tuple):
+        """Queues a row. Must be called from the event loop thread."""
+        if len(self._queue) >= self.max_queue:
+            self._stats["dropped"] += 1
+            return
+        self._queue.append(row)
+        self._stats["enqueued"] += 1
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["queued"] = len(self._queue)
+        return stats
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                await self._flush()
+
+    async def _flush(self):
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        try:
+            await run_db(write_log_rows, batch)
+        except Exception as e:
+            self._stats["write_errors"] += 1
+            self._stats["dropped"] += len(batch)
+            logger.error(f"[LOGS] Failed to write {len(batch)} log rows: {e}")
+            return
+        self._stats["written"] += len(batch)
+        self._stats["batches"] += 1
+
+
+# Global instance
+log_writer = LogWriter()
+
 
 def log_api_call(
     endpoint: str,
@@ -41,28 +151,25 @@ def log_api_call(
     status_text: str,
     ip_address: str | None,
     request_id: str | None,
+    cache_hits: int | None = None,
 ):
-    with get_conn() as conn:
-        conn.execute("""
-        INSERT INTO api_logs (
-            timestamp,
-            endpoint,
-            userrole,
-            url_count,
-            process_time,
-            status_code,
-            status_text,
-            ip_address,
-            request_id
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """, (
-            datetime.now(timezone.utc).isoformat(),
-            endpoint,
-            userrole,
-            url_count,
-            process_time,
-            status_code,
-            status_text,
-            ip_address,
-            request_id
-        ))
\ No newline at end of file
+    """
+    Records one API call. Queued for the background writer when it is
+    running, written immediately otherwise (scripts, startup).
+    """
+    row = (
+        datetime.now(timezone.utc).isoformat(),
+        endpoint,
+        userrole,
+        url_count,
+        process_time,
+        status_code,
+        status_text,
+        ip_address,
+        request_id,
+        cache_hits,
+    )
+    if log_writer.running:
+        log_writer.submit(row)
+    else:
+        write_log_rows([row])
@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUTTLCache:
+    """
+    Bounded in-memory cache. Entries expire `ttl_seconds` after the time
+    they were stored with, and the least recently used entry is evicted once
+    `max_entries` is exceeded.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()  # key -> (value, stored_at)
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str):
+        """Returns the value, or None when missing or expired."""
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str):
+        """Returns (value, stored_at), or None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            value, stored_at = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value, stored_at
+
+    def put(self, key: str, value, stored_at: float | None = None):
+        """Stores value; stored_at is a Unix timestamp and defaults to now."""
+        if self.max_entries <= 0:
+            return
+        stored_at = time.time() if stored_at is None else stored_at
+        if time.time() - stored_at > self.ttl_seconds:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                # Drop expired entries before evicting live ones
+                self._purge_expired()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, (_, stored_at) in self._entries.items() if stored_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        self._stats["expirations"] += len(expired)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else None
+        return stats
@@ -0,0 +1,224 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+from app.core.config import DATA_DIR, SNAPSHOT_MAX_MB, SNAPSHOT_CODEC
+from app.db.connection import connect
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = DATA_DIR / "snapshots.db"
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+# Pruning frees space down to this share of SNAPSHOT_MAX_MB, so it doesn't run on every save
+PRUNE_TARGET_RATIO = 0.9
+
+CODEC_SUFFIXES = {"zstd": ".html.zst", "gzip": ".html.gz"}
+
+
+def _pick_codec(name: str) -> str:
+    if name == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if name == "zstd" and zstandard is None:
+        logger.warning("[SNAPSHOT] zstandard is not installed, storing snapshots with gzip")
+        return "gzip"
+    if name not in CODEC_SUFFIXES:
+        raise ValueError(f"Unknown snapshot codec {name!r}, expected auto, zstd or gzip")
+    return name
+
+
+CODEC = _pick_codec(SNAPSHOT_CODEC)
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS snapshot_blobs (
+        sha256 TEXT PRIMARY KEY,        -- of the raw HTML
+        codec TEXT NOT NULL,
+        raw_bytes INTEGER NOT NULL,
+        stored_bytes INTEGER NOT NULL,
+        created_at TEXT NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        url TEXT PRIMARY KEY,           -- latest snapshot per listing
+        sha256 TEXT NOT NULL,
+        fetched_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_snapshots_fetched_at ON snapshots (fetched_at)",
+    "CREATE INDEX IF NOT EXISTS idx_snapshots_sha256 ON snapshots (sha256)",
+]
+
+# Bytes on disk, loaded on first use and kept current by save/prune
+_stored_bytes: int | None = None
+_stored_bytes_lock = threading.Lock()
+
+
+def get_conn():
+    return connect(DB_PATH)
+
+
+def init_snapshot_db():
+    with get_conn() as conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+
+def _blob_path(sha256: str, codec: str):
+    return SNAPSHOT_DIR / sha256[:2] / (sha256 + CODEC_SUFFIXES[codec])
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("snapshot is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _add_stored_bytes(conn, delta: int) -> int:
+    """Adds delta (already applied in conn's transaction) to the running total."""
+    global _stored_bytes
+    with _stored_bytes_lock:
+        if _stored_bytes is None:
+            (_stored_bytes,) = conn.execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM snapshot_blobs").fetchone()
+        else:
+            _stored_bytes += delta
+        return _stored_bytes
+
+
+def _delete_unreferenced(conn, sha256: str) -> int:
+    """Drops the blob if no snapshot points at it any more. Returns bytes freed."""
+    if conn.execute("SELECT 1 FROM snapshots WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone():
+        return 0
+    row = conn.execute("SELECT codec, stored_bytes FROM snapshot_blobs WHERE sha256 = ?", (sha256,)).fetchone()
+    if row is None:
+        return 0
+    codec, stored_bytes = row
+    conn.execute("DELETE FROM snapshot_blobs WHERE sha256 = ?", (sha256,))
+    _blob_path(sha256, codec).unlink(missing_ok=True)
+    return stored_bytes
+
+
+def save_snapshot(url: str, html: str, fetched_at: datetime | None = None) -> str:
+    """
+    Stores the page under its content hash (identical pages share one
+    file) and points `url` at it. Prunes the oldest snapshots once the
+    store is over SNAPSHOT_MAX_MB. Returns the hash.
+    """
+    raw = html.encode("utf-8")
+    sha256 = hashlib.sha256(raw).hexdigest()
+    fetched_at = (fetched_at or datetime.now(timezone.utc)).isoformat()
+
+    conn = get_conn()
+    # Compress before taking the write lock; re-scrapes of unchanged pages skip it
+    known = conn.execute("SELECT 1 FROM snapshot_blobs WHERE sha256 = ?", (sha256,)).fetchone()
+    data = None if known else _compress(raw, CODEC)
+
+    with conn:
+        # Write lock up front, so a blob can't be pruned between the check and the insert
+        conn.execute("BEGIN IMMEDIATE")
+        added = 0
+        if not conn.execute("SELECT 1 FROM snapshot_blobs WHERE sha256 = ?", (sha256,)).fetchone():
+            data = data or _compress(raw, CODEC)
+            path = _blob_path(sha256, CODEC)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial_path = path.with_name(path.name + ".partial")
+            partial_path.write_bytes(data)
+            os.replace(partial_path, path)
+            conn.execute(
+                "INSERT INTO snapshot_blobs (sha256, codec, raw_bytes, stored_bytes, created_at) VALUES (?, ?, ?, ?, ?)",
+                (sha256, CODEC, len(raw), len(data), fetched_at),
+            )
+            added = len(data)
+
+        previous = conn.execute("SELECT sha256 FROM snapshots WHERE url = ?", (url,)).fetchone()
+        conn.execute(
+            "INSERT INTO snapshots (url, sha256, fetched_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET sha256 = excluded.sha256, fetched_at = excluded.fetched_at",
+            (url, sha256, fetched_at),
+        )
+        freed = _delete_unreferenced(conn, previous[0]) if previous and previous[0] != sha256 else 0
+        stored_bytes = _add_stored_bytes(conn, added - freed)
+
+    if stored_bytes > SNAPSHOT_MAX_MB * 1024 * 1024:
+        prune_snapshots()
+    return sha256
+
+
+def load_snapshot(sha256: str, codec: str) -> str:
+    return _decompress(_blob_path(sha256, codec).read_bytes(), codec).decode("utf-8")
+
+
+def list_snapshots(after_url: str = "", limit: int = 100) -> list[tuple[str, str, str, str]]:
+    """(url, sha256, codec, fetched_at) for up to `limit` snapshots after `after_url`, by URL."""
+    with get_conn() as conn:
+        return conn.execute("""
+            SELECT s.url, s.sha256, b.codec, s.fetched_at
+            FROM snapshots s JOIN snapshot_blobs b ON b.sha256 = s.sha256
+            WHERE s.url > ?
+            ORDER BY s.url
+            LIMIT ?
+        """, (after_url, limit)).fetchall()
+
+
+def prune_snapshots(max_bytes: int | None = None) -> int:
+    """
+    Drops the least recently fetched snapshots until the store is under
+    PRUNE_TARGET_RATIO of max_bytes (default SNAPSHOT_MAX_MB). Returns
+    snapshots dropped.
+    """
+    global _stored_bytes
+    max_bytes = SNAPSHOT_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    target = max_bytes * PRUNE_TARGET_RATIO
+    dropped = 0
+    with get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        (total,) = conn.execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM snapshot_blobs").fetchone()
+        while total > target:
+            rows = conn.execute("SELECT url, sha256 FROM snapshots ORDER BY fetched_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            for url, sha256 in rows:
+                conn.execute("DELETE FROM snapshots WHERE url = ?", (url,))
+                total -= _delete_unreferenced(conn, sha256)
+                dropped += 1
+                if total <= target:
+                    break
+
+        with _stored_bytes_lock:
+            _stored_bytes = total
+    if dropped:
+        logger.info(f"[SNAPSHOT] Pruned {dropped} snapshot(s), {total / 1024 / 1024:.1f} MB kept")
+    return dropped
+
+
+def snapshot_stats() -> dict:
+    with get_conn() as conn:
+        (snapshots,) = conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()
+        blobs, raw_bytes, stored_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(stored_bytes), 0) FROM snapshot_blobs"
+        ).fetchone()
+    return {
+        "codec": CODEC,
+        "snapshots": snapshots,
+        "blobs": blobs,
+        "raw_mb": round(raw_bytes / 1024 / 1024, 2),
+        "stored_mb": round(stored_bytes / 1024 / 1024, 2),
+        "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+        "max_mb": SNAPSHOT_MAX_MB,
+    }
@@ -1,15 +1,29 @@
 import time
 import os
+import asyncio
 import logging
+import threading
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import HTTPException, RequestValidationError
 from contextlib import asynccontextmanager
+from starlette.routing import Match
 from app.api.router import api_router
 from app.api.routes.admin import router as admin_router
+from app.api.routes.metrics import router as metrics_router
 from app.db.cache import init_cache_db
-from app.db.logging import init_logging_db, log_api_call
-from app.db.log_retention import archive_completed_months
+from app.db.snapshots import init_snapshot_db
+from app.db.logging import init_logging_db, log_api_call, log_writer
+from app.db.log_retention import archive_in_background
+from app.db.connection import close_all
+from app.services.browser_pool import browser_pool
+from app.services.http_fetcher import http_fetcher
+from app.services.parse_pool import parse_pool
+from app.services.precache_queue import precache_queue
+from app.services.cache_refresher import cache_refresher
+from app.services.reparser import reparser
+from app.core.config import BROWSER_PREWARM
+from app.core.metrics import REQUESTS, REQUEST_SECONDS, set_request_labels
 from http import HTTPStatus
 from fastapi.middleware.cors import CORSMiddleware
 import uuid
@@ -18,16 +32,41 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 )
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # ---- startup ----
     init_cache_db()
+    init_snapshot_db()
     init_logging_db()
-    archive_completed_months()
+    log_writer.start()
+    parse_pool.start()
+    await http_fetcher.start()
+    if BROWSER_PREWARM:
+        try:
+            await browser_pool.start()
+        except Exception as e:
+            # HTTP fetches still work; the pool tries again on first browser use
+            logger.error(f"[POOL] Pre-warm failed, launching on first use instead: {e}")
+    precache_queue.start()
+    cache_refresher.start()
+    # Archive completed log months once the app is serving, not before
+    archive_stop = threading.Event()
+    archive_task = asyncio.create_task(archive_in_background(archive_stop))
     yield
     # ---- shutdown ----
-    # (nothing needed yet)
+    archive_stop.set()
+    archive_task.cancel()
+    await asyncio.gather(archive_task, return_exceptions=True)
+    await reparser.stop()
+    await cache_refresher.stop()
+    await precache_queue.stop()
+    await browser_pool.close()
+    await http_fetcher.close()
+    parse_pool.close()
+    await log_writer.stop()
+    close_all()
 
 app = FastAPI(
     title="CarMetrics API",
@@ -47,14 +86,35 @@ app.add_middleware(
 )
 
 
+def _route_template(request: Request) -> str:
+    """Path template of the route the request will be dispatched to, or "unmatched"."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
 @app.middleware("http")
 async def timing_and_logging(request: Request, call_next):
     request_id = str(uuid.uuid4())
     request.state.request_id = request_id
+    # Never the raw path: path parameters and 404s would make unbounded series
+    endpoint = _route_template(request)
+    set_request_labels(endpoint=endpoint)
 
     start = time.perf_counter()
     response = await call_next(request)
-    duration = round(time.perf_counter() - start, 4)
+    elapsed = time.perf_counter() - start
+    duration = round(elapsed, 4)
+
+    # Label and log by route template so path parameters (precache job ids)
+    # don't make new metric series or traffic rollup rows
+    route = request.scope.get("route")
+    endpoint = route.path if route else endpoint
+    set_request_labels(endpoint=endpoint, role=getattr(request.state, "metrics_role", None))
+    REQUESTS.inc(str(response.status_code))
+    REQUEST_SECONDS.observe(elapsed)
 
     # Expose to client
     response.headers["X-Request-ID"] = request_id
@@ -67,15 +127,17 @@ async def timing_and_logging(request: Request, call_next):
     )
 
     if request.url.path.startswith("/api"):
+        # Routes may attach a more specific outcome than the HTTP status
         log_api_call(
-            endpoint=request.url.path,
+            endpoint=endpoint,
             userrole=getattr(request.state, "userrole", None),
             url_count=getattr(request.state, "url_count", None),
             process_time=duration,
-            status_code=response.status_code,
-            status_text=HTTPStatus(response.status_code).phrase,
+            status_code=getattr(request.state, "status_code", response.status_code),
+            status_text=getattr(request.state, "status_text", None) or HTTPStatus(response.status_code).phrase,
             ip_address=ip_address,
             request_id=request_id,
+            cache_hits=getattr(request.state, "cache_hits", None),
         )
 
     return response
@@ -125,4 +187,5 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 
 
 app.include_router(api_router, prefix="/api")
-app.include_router(admin_router)
\ No newline at end of file
+app.include_router(admin_router)
+app.include_router(metrics_router)
\ No newline at end of file
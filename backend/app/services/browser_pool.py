@@ -0,0 +1,289 @@
+import asyncio
+import time
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from playwright.async_api import async_playwright
+
+from app.core.config import BROWSER_MAX_PAGES, BROWSER_BLOCK_RESOURCES, BROWSER_BLOCK_TRACKERS
+from app.core.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--no-zygote",
+    "--single-process",
+    "--disable-software-rasterizer",
+]
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Analytics and ad hosts aborted when tracker blocking is on (suffix match)
+TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "tiktok.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+)
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _site(host: str) -> str:
+    # Good enough for the listing sites: "www.sgcarmart.com" -> "sgcarmart.com"
+    return ".".join(host.split(".")[-2:])
+
+
+def _is_tracker(host: str) -> bool:
+    return any(host == t or host.endswith("." + t) for t in TRACKER_HOSTS)
+
+
+class BrowserPool:
+    """
+    Keeps one Chromium instance alive for the whole app and hands out
+    isolated browser contexts. The browser is replaced after it has served
+    `max_pages` pages or when it disconnects (crash). Contexts abort the
+    resource types in `block_resources` and, with `block_trackers`, known
+    analytics/ad hosts and third-party iframes.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = BROWSER_MAX_PAGES,
+        block_resources: list[str] = BROWSER_BLOCK_RESOURCES,
+        block_trackers: bool = BROWSER_BLOCK_TRACKERS,
+    ):
+        self.max_pages = max_pages
+        self.block_resources = frozenset(block_resources)
+        self.block_trackers = block_trackers
+        self._playwright = None
+        self._browser = None
+        self._browser_pages = 0
+        self._active: dict = {}      # browser -> open contexts
+        self._retired: set = set()   # browsers waiting for their contexts to close
+        self._closing: set = set()   # browsers we are closing on purpose
+        self._lock = asyncio.Lock()
+        self._stats = {
+            "launches": 0,
+            "recycles": 0,
+            "crashes": 0,
+            "acquires": 0,
+            "reuses": 0,
+            "pages": 0,
+            "acquire_wait_seconds": 0.0,
+            "max_acquire_wait_seconds": 0.0,
+            "blocked_requests": 0,
+        }
+        self._blocked_by_reason: dict[str, int] = {}
+        # policy label -> page load totals, so runs with different
+        # BROWSER_BLOCK_* / PAGE_WAIT_MODE settings can be compared
+        self._page_loads: dict[str, dict] = {}
+
+    @property
+    def policy(self) -> str:
+        """Short label for the active request-interception policy."""
+        blocked = ",".join(sorted(self.block_resources)) or "none"
+        return f"block={blocked};trackers={'on' if self.block_trackers else 'off'}"
+
+    async def start(self):
+        """Starts Playwright and launches the first browser."""
+        async with self._lock:
+            await self._ensure_browser()
+
+    async def close(self):
+        """Closes every browser and stops Playwright."""
+        async with self._lock:
+            browsers = set(self._active) | self._retired
+            if self._browser is not None:
+                browsers.add(self._browser)
+            for browser in browsers:
+                await self._close_browser(browser)
+            self._browser = None
+            self._active.clear()
+            self._retired.clear()
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info(f"[POOL] Closed | {self.stats()}")
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["active_contexts"] = sum(self._active.values())
+        stats["browser_pages"] = self._browser_pages
+        stats["connected"] = bool(self._browser and self._browser.is_connected())
+        stats["policy"] = self.policy
+        stats["blocked_by_reason"] = dict(self._blocked_by_reason)
+        page_loads = {}
+        for label, totals in self._page_loads.items():
+            pages = totals["pages"]
+            page_loads[label] = {
+                **totals,
+                "load_seconds": round(totals["load_seconds"], 3),
+                "avg_load_seconds": round(totals["load_seconds"] / pages, 3),
+                "avg_bytes": totals["bytes"] // pages,
+                "avg_requests": round(totals["requests"] / pages, 1),
+            }
+        stats["page_loads"] = page_loads
+        return stats
+
+    def record_page_load(self, wait_mode: str, seconds: float, nbytes: int, requests: int):
+        """Adds one finished page load to the totals for the active policy."""
+        label = f"{self.policy};wait={wait_mode}"
+        totals = self._page_loads.setdefault(label, {
+            "pages": 0,
+            "bytes": 0,
+            "requests": 0,
+            "load_seconds": 0.0,
+            "max_load_seconds": 0.0,
+        })
+        totals["pages"] += 1
+        totals["bytes"] += nbytes
+        totals["requests"] += requests
+        totals["load_seconds"] += seconds
+        totals["max_load_seconds"] = round(max(totals["max_load_seconds"], seconds), 3)
+
+    @asynccontextmanager
+    async def context(self):
+        """Yields a fresh browser context on the shared browser."""
+        start = time.perf_counter()
+        async with self._lock:
+            browser = await self._ensure_browser()
+            self._active[browser] = self._active.get(browser, 0) + 1
+
+        try:
+            context = await browser.new_context(user_agent=USER_AGENT)
+        except Exception:
+            await self._release(browser)
+            raise
+
+        waited = time.perf_counter() - start
+        self._stats["acquires"] += 1
+        self._stats["acquire_wait_seconds"] += waited
+        self._stats["max_acquire_wait_seconds"] = max(self._stats["max_acquire_wait_seconds"], waited)
+        context.on("page", lambda _page: self._on_page(browser))
+        if self.block_resources or self.block_trackers:
+            await context.route("**/*", self._route)
+
+        try:
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"[POOL] Context close failed: {e}")
+            await self._release(browser)
+
+    def _block_reason(self, request):
+        """Returns why `request` should be aborted, or None to let it through."""
+        if request.resource_type in self.block_resources:
+            return request.resource_type
+        if not self.block_trackers:
+            return None
+        host = _host(request.url)
+        if _is_tracker(host):
+            return "tracker"
+        # Ad iframes: documents loaded into a child frame from another site
+        if request.resource_type == "document":
+            frame = request.frame
+            if frame.parent_frame is not None and _site(host) != _site(_host(frame.page.main_frame.url)):
+                return "third_party_frame"
+        return None
+
+    async def _route(self, route):
+        # img src attributes stay in the markup, so the parser still sees
+        # the carousel image URLs when image downloads are aborted
+        try:
+            reason = self._block_reason(route.request)
+            if reason is None:
+                await route.continue_()
+                return
+            self._stats["blocked_requests"] += 1
+            self._blocked_by_reason[reason] = self._blocked_by_reason.get(reason, 0) + 1
+            await route.abort("blockedbyclient")
+        except Exception as e:
+            # The page was closed while the request was in flight
+            logger.debug(f"[POOL] Route handling failed for {route.request.url}: {e}")
+
+    async def _ensure_browser(self):
+        """Returns the current browser, launching or recycling it if needed. Caller holds the lock."""
+        browser = self._browser
+        if browser is not None and browser.is_connected() and self._browser_pages < self.max_pages:
+            self._stats["reuses"] += 1
+            return browser
+
+        if browser is not None:
+            if browser.is_connected():
+                self._stats["recycles"] += 1
+                logger.info(f"[POOL] Recycling browser after {self._browser_pages} pages")
+            self._browser = None
+            self._retired.add(browser)
+            if not self._active.get(browser):
+                await self._close_browser(browser)
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+        launch_start = time.time()
+        browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        browser.on("disconnected", self._on_disconnected)
+        launch_seconds = time.time() - launch_start
+        STAGE_SECONDS.observe(launch_seconds, "browser_launch")
+        logger.info(f"[POOL] Browser launched in {launch_seconds:.2f}s")
+
+        self._browser = browser
+        self._browser_pages = 0
+        self._stats["launches"] += 1
+        return browser
+
+    async def _release(self, browser):
+        count = self._active.get(browser, 0) - 1
+        if count > 0:
+            self._active[browser] = count
+            return
+        self._active.pop(browser, None)
+        if browser in self._retired:
+            await self._close_browser(browser)
+
+    async def _close_browser(self, browser):
+        self._retired.discard(browser)
+        self._closing.add(browser)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning(f"[POOL] Browser close failed: {e}")
+
+    def _on_page(self, browser):
+        self._stats["pages"] += 1
+        if browser is self._browser:
+            self._browser_pages += 1
+
+    def _on_disconnected(self, browser):
+        if browser in self._closing:
+            self._closing.discard(browser)
+            return
+        self._stats["crashes"] += 1
+        logger.error("[POOL] Browser disconnected unexpectedly, will relaunch on next acquire")
+        if browser is self._browser:
+            self._browser = None
+        self._retired.discard(browser)
+
+
+# Global instance
+browser_pool = BrowserPool()
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+
+from app.core.config import (
+    REFRESH_INTERVAL_SECONDS,
+    REFRESH_AHEAD_HOURS,
+    REFRESH_BATCH_SIZE,
+    REFRESH_MIN_HITS,
+    REFRESH_ACCESS_WINDOW_HOURS,
+)
+from app.db.cache import flush_access_counts, get_refresh_candidates
+from app.db.connection import run_db
+from app.services.precache_queue import precache_queue
+
+logger = logging.getLogger(__name__)
+
+
+class CacheRefresher:
+    """
+    Periodically writes out cache access counts and re-scrapes the
+    most-requested listings before they expire, so popular URLs are rarely
+    served stale. Listings nobody has read lately are left to expire.
+    Re-scrapes go through the precache queue.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = REFRESH_INTERVAL_SECONDS,
+        ahead_hours: float = REFRESH_AHEAD_HOURS,
+        batch_size: int = REFRESH_BATCH_SIZE,
+        min_hits: int = REFRESH_MIN_HITS,
+        access_window_hours: float = REFRESH_ACCESS_WINDOW_HOURS,
+    ):
+        self.interval_seconds = interval_seconds
+        self.ahead_hours = ahead_hours
+        self.batch_size = batch_size
+        self.min_hits = min_hits
+        self.access_window_hours = access_window_hours
+        self._task = None
+        self._stats = {"runs": 0, "access_urls_flushed": 0, "urls_refreshed": 0, "errors": 0}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        # Keep the hits counted since the last run
+        try:
+            await run_db(flush_access_counts)
+        except Exception as e:
+            logger.error(f"[REFRESH] Final access flush failed: {e}")
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["running"] = self._task is not None
+        return stats
+
+    async def refresh_once(self) -> list[str]:
+        """Flushes access counts and queues expiring popular listings. Returns the queued URLs."""
+        self._stats["runs"] += 1
+        self._stats["access_urls_flushed"] += await run_db(flush_access_counts)
+
+        candidates = await run_db(
+            get_refresh_candidates, self.ahead_hours, self.min_hits, self.batch_size, self.access_window_hours
+        )
+        urls = [url for url in candidates if not precache_queue.is_pending(url)]
+        if urls:
+            precache_queue.enqueue(urls)
+            self._stats["urls_refreshed"] += len(urls)
+            logger.info(f"[REFRESH] Queued {len(urls)} expiring listing(s) for re-scrape")
+        return urls
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"[REFRESH] Run failed: {e}")
+
+
+# Global instance
+cache_refresher = CacheRefresher()
@@ -0,0 +1,193 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlparse
+
+from app.core.config import FETCH_GLOBAL_LIMIT, FETCH_PER_HOST_LIMIT, FETCH_SLOW_SECONDS, FETCH_BACKOFF_MAX_SECONDS
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE_SECONDS = 0.5
+
+
+class FetchSlot:
+    """Handed to the fetcher; set `status` so the scheduler can adapt."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.status: Optional[int] = None
+
+
+class _HostState:
+    def __init__(self):
+        self.active = 0
+        self.delay = 0.0          # current backoff between request starts
+        self.next_start = 0.0     # monotonic time before which no request may start
+        self.throttled = 0
+        self.slow = 0
+
+
+class FetchScheduler:
+    """
+    Process-wide limiter for outbound page fetches. Enforces a global and a
+    per-host concurrency limit, serves waiting clients round-robin so one
+    big batch cannot starve everyone else, and spaces out requests to a host
+    that answers slowly or with 429/5xx.
+    """
+
+    def __init__(
+        self,
+        global_limit: int = FETCH_GLOBAL_LIMIT,
+        per_host_limit: int = FETCH_PER_HOST_LIMIT,
+        slow_seconds: float = FETCH_SLOW_SECONDS,
+        backoff_max_seconds: float = FETCH_BACKOFF_MAX_SECONDS,
+    ):
+        self.global_limit = max(1, global_limit)
+        self.per_host_limit = max(1, per_host_limit)
+        self.slow_seconds = slow_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._active = 0
+        self._hosts: dict[str, _HostState] = {}
+        self._waiters: OrderedDict[str, deque] = OrderedDict()  # client -> deque[(host, future)]
+        self._stats = {
+            "acquired": 0,
+            "queued": 0,
+            "max_queue_depth": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["active"] = self._active
+        stats["queue_depth"] = self._queue_depth()
+        stats["waiting_clients"] = len(self._waiters)
+        stats["hosts"] = {
+            host: {
+                "active": state.active,
+                "backoff_seconds": round(state.delay, 3),
+                "throttled": state.throttled,
+                "slow": state.slow,
+            }
+            for host, state in self._hosts.items()
+        }
+        return stats
+
+    @asynccontextmanager
+    async def slot(self, url: str, client: str = "anonymous"):
+        """Waits for capacity to fetch `url` on behalf of `client`."""
+        host = urlparse(url).netloc or url
+        queued_at = time.monotonic()
+        await self._acquire(host, client)
+
+        waited = time.monotonic() - queued_at
+        self._stats["acquired"] += 1
+        self._stats["wait_seconds"] += waited
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+
+        slot = FetchSlot(host)
+        started = None
+        try:
+            await self._respect_backoff(self._hosts[host])
+            started = time.monotonic()
+            yield slot
+        finally:
+            if started is not None:
+                self._adapt(self._hosts[host], slot.status, time.monotonic() - started)
+            self._release(host)
+
+    def _queue_depth(self) -> int:
+        return sum(len(waiting) for waiting in self._waiters.values())
+
+    def _has_capacity(self, host: str) -> bool:
+        state = self._hosts.get(host)
+        return self._active < self.global_limit and (state is None or state.active < self.per_host_limit)
+
+    def _grant(self, host: str):
+        self._active += 1
+        self._hosts.setdefault(host, _HostState()).active += 1
+
+    async def _acquire(self, host: str, client: str):
+        if not self._waiters and self._has_capacity(host):
+            self._grant(host)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append((host, future))
+        self._stats["queued"] += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue_depth())
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self._release(host)
+            else:
+                self._remove_waiter(client, future)
+            raise
+
+    def _remove_waiter(self, client: str, future):
+        waiting = self._waiters.get(client)
+        if not waiting:
+            return
+        for entry in waiting:
+            if entry[1] is future:
+                waiting.remove(entry)
+                break
+        if not waiting:
+            del self._waiters[client]
+
+    def _release(self, host: str):
+        self._active -= 1
+        self._hosts[host].active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grants free slots to waiting clients in round-robin order."""
+        while self._waiters and self._active < self.global_limit:
+            for client, waiting in self._waiters.items():
+                host, future = waiting[0]
+                if future.done() or self._has_capacity(host):
+                    break
+            else:
+                return  # every waiting client is blocked on a saturated host
+
+            waiting.popleft()
+            if waiting:
+                # Served: this client goes to the back of the line
+                self._waiters.move_to_end(client)
+            else:
+                del self._waiters[client]
+
+            if not future.done():  # skip waiters cancelled but not yet cleaned up
+                self._grant(host)
+                future.set_result(None)
+
+    async def _respect_backoff(self, state: _HostState):
+        now = time.monotonic()
+        start_at = max(now, state.next_start)
+        state.next_start = start_at + state.delay
+        if start_at > now:
+            self._stats["backoff_seconds"] += start_at - now
+            await asyncio.sleep(start_at - now)
+
+    def _adapt(self, state: _HostState, status: Optional[int], elapsed: float):
+        throttled = status is not None and (status == 429 or status >= 500)
+        slow = elapsed > self.slow_seconds
+        if throttled or slow:
+            state.throttled += throttled
+            state.slow += slow
+            state.delay = min(max(state.delay * 2, BACKOFF_BASE_SECONDS), self.backoff_max_seconds)
+            logger.warning(f"[SCHEDULER] Backing off to {state.delay:.1f}s (status={status}, {elapsed:.1f}s)")
+        elif state.delay:
+            state.delay = state.delay / 2 if state.delay > BACKOFF_BASE_SECONDS else 0.0
+
+
+# Global instance
+fetch_scheduler = FetchScheduler()
@@ -0,0 +1,99 @@
+import time
+import logging
+from typing import Optional
+import httpx
+
+from app.core.config import HTTP_TIMEOUT_SECONDS, HTTP_MAX_CONNECTIONS
+from app.core.metrics import STAGE_ERRORS, STAGE_SECONDS
+from app.services.browser_pool import USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+# parse_listing reads its fields from these blocks; without them the page
+# was not server-rendered and has to go through the browser
+REQUIRED_MARKER = "styles_item__"
+
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-SG,en;q=0.9",
+}
+
+
+class HttpFetcher:
+    """
+    Fetches listing pages with a pooled keep-alive HTTP client.
+    """
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT_SECONDS, max_connections: int = HTTP_MAX_CONNECTIONS):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str, validators: Optional[dict] = None) -> tuple[Optional[str], Optional[str], Optional[int], dict]:
+        """
+        Returns (html, error, status_code, validators). html is None when the
+        request failed, the page is missing the server-rendered detail
+        blocks, or (status 304) it has not changed since the "etag" /
+        "last_modified" in `validators`. The returned validators are the
+        response's, falling back to the ones sent.
+        """
+        await self.start()
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        start = time.time()
+        try:
+            with STAGE_SECONDS.time("http_fetch"):
+                response = await self._client.get(url, headers=headers)
+        except Exception as e:
+            # Not only httpx.HTTPError: a malformed URL raises httpx.InvalidURL
+            STAGE_ERRORS.inc("http_fetch")
+            logger.info(f"[HTTP] Failed in {time.time() - start:.2f}s: {url} - {e!r}")
+            return None, f"{type(e).__name__}: {e}", None, validators
+
+        received = {
+            "etag": response.headers.get("etag") or validators.get("etag"),
+            "last_modified": response.headers.get("last-modified") or validators.get("last_modified"),
+        }
+        if response.status_code == 304 and headers:
+            logger.info(f"[HTTP] Not modified in {time.time() - start:.2f}s: {url}")
+            return None, None, 304, received
+
+        if response.status_code != 200:
+            STAGE_ERRORS.inc("http_fetch")
+            logger.info(f"[HTTP] Status {response.status_code} in {time.time() - start:.2f}s: {url}")
+            return None, f"HTTP {response.status_code}", response.status_code, received
+
+        html = response.text
+        if REQUIRED_MARKER not in html:
+            logger.info(f"[HTTP] Detail blocks missing in {time.time() - start:.2f}s: {url}")
+            return None, "detail blocks missing", response.status_code, received
+
+        logger.info(f"[HTTP] Complete in {time.time() - start:.2f}s: {url}")
+        return html, None, response.status_code, received
+
+
+# Global instance
+http_fetcher = HttpFetcher()
@@ -0,0 +1,145 @@
+import time
+import logging
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from app.db.cache import get_conn
+
+logger = logging.getLogger(__name__)
+
+GROUP_BY_FIELDS = ("model", "type", "vehicle_type")
+PERCENTILES = (10, 25, 50, 75, 90)
+# A COE is valid for 10 years; the unused part is what the buyer pays for
+COE_TERM_MONTHS = 120
+
+NUMERIC_COLUMNS = ["price", "depreciation", "coe", "power_bhp"]
+LOAD_COLUMNS = ["url", "version", "model", "type", "vehicle_type", "coe_left", *NUMERIC_COLUMNS]
+LOAD_SQL = f"""
+SELECT {", ".join(f'"{name}"' for name in LOAD_COLUMNS)} FROM listings
+WHERE version > ?
+ORDER BY version
+"""
+# parse_listing stores coe_left as "5 year(s) 3 month(s)"
+COE_LEFT_PATTERN = r"(\d+) year\(s\) (\d+) month\(s\)"
+
+
+def _derive(frame: pd.DataFrame) -> pd.DataFrame:
+    """Adds the per-listing metrics the group stats are built from."""
+    frame[NUMERIC_COLUMNS] = frame[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce").astype(float)
+    parts = frame["coe_left"].fillna("").astype(str).str.extract(COE_LEFT_PATTERN).astype(float)
+    frame["coe_left_months"] = parts[0] * 12 + parts[1]
+    frame["coe_left_value"] = frame["coe"] * frame["coe_left_months"] / COE_TERM_MONTHS
+    bhp = frame["power_bhp"].where(frame["power_bhp"] > 0)
+    frame["price_per_bhp"] = frame["price"] / bhp
+    return frame
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return round(float(value), 2)
+
+
+class MarketStats:
+    """
+    Aggregate market stats over the listings cache, grouped by model, type
+    or vehicle_type. Listings are kept in an in-memory DataFrame that only
+    loads rows written since the last load (an indexed range scan on the
+    write version), and only the groups those rows touch are recomputed.
+    """
+
+    def __init__(self):
+        self._frame = _derive(pd.DataFrame(columns=LOAD_COLUMNS).set_index("url"))
+        self._loaded_until = 0
+        self._groups: dict[str, dict] = {}             # group_by -> key -> stats
+        self._dirty: dict[str, set] = {}               # group_by -> keys to recompute
+        self._lock = Lock()
+        self._stats = {"loads": 0, "rows_loaded": 0, "groups_recomputed": 0, "compute_seconds": 0.0}
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["compute_seconds"] = round(stats["compute_seconds"], 4)
+        stats["listings"] = len(self._frame)
+        stats["cached_groups"] = {group_by: len(groups) for group_by, groups in self._groups.items()}
+        return stats
+
+    def get(self, group_by: str, key: str | None = None, min_count: int = 1) -> list[dict]:
+        """
+        Returns stats per group, largest groups first. Blocking (reads
+        SQLite); call it through run_db.
+        """
+        if group_by not in GROUP_BY_FIELDS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY_FIELDS)}")
+
+        with self._lock:
+            self._load_new_rows()
+            groups = self._compute(group_by)
+            if key is not None:
+                selected = [groups[key]] if key in groups else []
+            else:
+                selected = [stats for stats in groups.values() if stats["count"] >= min_count]
+        return sorted(selected, key=lambda stats: (-stats["count"], stats["key"]))
+
+    def _load_new_rows(self):
+        with get_conn() as conn:
+            rows = conn.execute(LOAD_SQL, (self._loaded_until,)).fetchall()
+        if not rows:
+            return
+
+        new = _derive(pd.DataFrame(rows, columns=LOAD_COLUMNS).drop_duplicates("url", keep="last").set_index("url"))
+        # A re-scraped listing may have moved group, so both old and new keys are dirty
+        replaced = self._frame.index.intersection(new.index)
+        for group_by in GROUP_BY_FIELDS:
+            dirty = self._dirty.setdefault(group_by, set())
+            dirty.update(new[group_by].dropna())
+            dirty.update(self._frame.loc[replaced, group_by].dropna())
+
+        kept = self._frame.drop(replaced)
+        self._frame = new if kept.empty else pd.concat([kept, new])
+        self._loaded_until = rows[-1][1]
+        self._stats["loads"] += 1
+        self._stats["rows_loaded"] += len(rows)
+
+    def _compute(self, group_by: str) -> dict:
+        groups = self._groups.get(group_by)
+        if groups is None:
+            groups = self._groups[group_by] = {}
+            subset = self._frame
+        else:
+            dirty = self._dirty.get(group_by)
+            if not dirty:
+                return groups
+            subset = self._frame[self._frame[group_by].isin(dirty)]
+            for key in dirty:
+                groups.pop(key, None)
+        self._dirty[group_by] = set()
+
+        start = time.perf_counter()
+        subset = subset[subset[group_by].fillna("") != ""]
+        grouped = subset.groupby(group_by)
+        quantiles = [p / 100 for p in PERCENTILES]
+        price = grouped["price"].quantile(quantiles).unstack()
+        depreciation = grouped["depreciation"].quantile(quantiles).unstack()
+        medians = grouped[["coe_left_months", "coe_left_value", "price_per_bhp"]].median()
+        counts = grouped.size()
+
+        for key, count in counts.items():
+            groups[key] = {
+                "key": key,
+                "count": int(count),
+                "price": {f"p{p}": _clean(price.at[key, q]) for p, q in zip(PERCENTILES, quantiles)},
+                "depreciation": {f"p{p}": _clean(depreciation.at[key, q]) for p, q in zip(PERCENTILES, quantiles)},
+                "median_coe_left_months": _clean(medians.at[key, "coe_left_months"]),
+                "median_coe_left_value": _clean(medians.at[key, "coe_left_value"]),
+                "median_price_per_bhp": _clean(medians.at[key, "price_per_bhp"]),
+            }
+
+        self._stats["groups_recomputed"] += len(counts)
+        self._stats["compute_seconds"] += time.perf_counter() - start
+        return groups
+
+
+# Global instance
+market_stats = MarketStats()
@@ -0,0 +1,123 @@
+import asyncio
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.core.config import PARSE_EXECUTOR, PARSE_WORKERS, PARSE_MAX_QUEUE
+from app.models.car import CarListing
+from app.services.parser import listing_fingerprint, parse_listing
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_parse(html: str, url: str) -> tuple[CarListing, float]:
+    """Runs in the worker; returns the listing and the time spent parsing."""
+    start = time.perf_counter()
+    listing = parse_listing(html, url)
+    return listing, time.perf_counter() - start
+
+
+def _timed_parse_if_changed(html: str, url: str, previous_fingerprint: str | None) -> tuple[tuple, float]:
+    """
+    Runs in the worker; returns ((listing, fingerprint), seconds), with
+    listing None when the fingerprint matches previous_fingerprint.
+    """
+    start = time.perf_counter()
+    fingerprint = listing_fingerprint(html)
+    if fingerprint is not None and fingerprint == previous_fingerprint:
+        return (None, fingerprint), time.perf_counter() - start
+    return (parse_listing(html, url), fingerprint), time.perf_counter() - start
+
+
+class ParsePool:
+    """
+    Runs parse_listing off the event loop in a process or thread pool.
+    """
+
+    def __init__(self, kind: str = PARSE_EXECUTOR, workers: int = PARSE_WORKERS, max_queue: int = PARSE_MAX_QUEUE):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.max_queue)
+        self._pending = 0
+        self._running = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "max_queue_depth": 0,
+            "parse_seconds": 0.0,
+            "queue_wait_seconds": 0.0,
+        }
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            # spawn, because forking after Playwright/httpx have started threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        logger.info(f"[PARSE] Started {self.kind} pool with {self.workers} worker(s)")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats.update(
+            executor=self.kind,
+            workers=self.workers,
+            max_queue=self.max_queue,
+            queue_depth=self._pending,
+            running=self._running,
+        )
+        return stats
+
+    async def parse(self, html: str, url: str) -> CarListing:
+        """Parses one page in the pool. Raises whatever parse_listing raised."""
+        return await self._submit(_timed_parse, html, url)
+
+    async def parse_if_changed(self, html: str, url: str, previous_fingerprint: str | None) -> tuple[CarListing | None, str | None]:
+        """
+        Fingerprints the page and parses it only if the fingerprint differs
+        from previous_fingerprint. Returns (listing or None, fingerprint).
+        """
+        return await self._submit(_timed_parse_if_changed, html, url, previous_fingerprint)
+
+    async def _submit(self, fn, *args):
+        self.start()
+        self._stats["submitted"] += 1
+        self._pending += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._pending)
+        queued_at = time.perf_counter()
+
+        try:
+            async with self._slots:
+                self._stats["queue_wait_seconds"] += time.perf_counter() - queued_at
+                self._running += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    result, seconds = await loop.run_in_executor(self._executor, fn, *args)
+                finally:
+                    self._running -= 1
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        self._stats["completed"] += 1
+        self._stats["parse_seconds"] += seconds
+        return result
+
+
+# Global instance
+parse_pool = ParsePool()
@@ -1,46 +1,156 @@
 import re
+import hashlib
+from pathlib import Path
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from app.models import car
 from app.models.car import CarListing
+from app.utils import parsers, extractors, finance
 from app.utils.parsers import parse_price, parse_int, parse_float, parse_mileage
-from app.utils.extractors import extract_title, extract_manufactured_year, build_model_name
-from app.utils.finance import calculate_loan_term, calculate_monthly, calculate_car_age_months
+from app.utils.extractors import title_from_link, extract_manufactured_year, build_model_name
+from app.utils.finance import calculate_loan_term, apply_financing, calculate_car_age_months
+
+try:
+    import lxml.html as lxml_html
+    HTML_PARSER = "lxml"
+except ImportError:
+    lxml_html = None
+    HTML_PARSER = "html.parser"
 
 
 CURRENT_YEAR = datetime.now().year
 
+# Sgcarmart's CSS-module class prefixes (the suffix is a build hash)
+ITEM_CLASS = "styles_item__"
+DETAIL_TITLE_CLASS = "styles_detailTitle__"
+DESC_CLASS = "styles_descContainer__"
+TITLE_CONTAINER_CLASS = "styles_titleContainer__"
+TITLE_LINK_CLASS = "styles_link_color__"
+CAROUSEL_IMAGE_CLASS = "carousel_image"
+SCANNED_TAGS = ["div", "a", "img"]
+
+# Everything parse_listing reads: detail blocks, the title link and carousel images
+FINGERPRINT_XPATH = (
+    f"//div[contains(@class, '{ITEM_CLASS}')]"
+    f" | //a[contains(@class, '{TITLE_LINK_CLASS}')]"
+    f" | //img[contains(@class, '{CAROUSEL_IMAGE_CLASS}')]/@src"
+)
+
+COE_YEARS_RE = re.compile(r"(\d+)\s*(?:y|yr|yrs|year|years)", re.IGNORECASE)
+COE_MONTHS_RE = re.compile(r"(\d+)\s*(?:m|mth|mths|month|months)", re.IGNORECASE)
+
+
+def _class_string(tag) -> str:
+    classes = tag.get("class")
+    if not classes:
+        return ""
+    return classes if isinstance(classes, str) else " ".join(classes)
+
+
+def _read_item(item, raw: dict) -> tuple[bool, str | None]:
+    """
+    Reads one styles_item__ block into raw. Returns (is_category_block,
+    category_text).
+    """
+    title = value = title_container = None
+    for div in item.find_all("div"):
+        classes = _class_string(div)
+        if not classes:
+            continue
+        if title is None and DETAIL_TITLE_CLASS in classes:
+            title = div
+        if value is None and DESC_CLASS in classes:
+            value = div
+        if title_container is None and TITLE_CONTAINER_CLASS in classes:
+            title_container = div
+
+    if title and value:
+        raw[title.text.strip()] = value.get_text(" ", strip=True)
+
+    if title_container and title_container.text.strip() == "Category":
+        return True, value.get_text(strip=True) if value else None
+    return False, None
+
+
+def extract_raw_fields(soup: BeautifulSoup) -> tuple[dict, list[str]]:
+    """
+    Collects the title, detail blocks, category and carousel images in a
+    single pass over the document. Returns (raw, image_urls).
+    """
+    raw = {}
+    title_link = None
+    category_found = False
+    category = None
+    image_urls = []
+
+    for tag in soup.find_all(SCANNED_TAGS):
+        name = tag.name
+        if name == "div":
+            if ITEM_CLASS in _class_string(tag):
+                is_category, item_category = _read_item(tag, raw)
+                if is_category and not category_found:
+                    category_found = True
+                    category = item_category
+        elif name == "img":
+            classes = tag.get("class") or ()
+            if CAROUSEL_IMAGE_CLASS in classes:
+                src = tag.get("src")
+                if src:
+                    image_urls.append(src)
+        elif title_link is None and TITLE_LINK_CLASS in _class_string(tag):
+            title_link = tag
+
+    # A detail row literally named "Title" takes precedence, as before
+    raw.setdefault("Title", title_from_link(title_link))
+
+    # The first dedicated Category block wins over a detail row of the same name
+    if category is not None:
+        raw["Category"] = category
+
+    # Deduplicate while preserving order
+    return raw, list(dict.fromkeys(image_urls))
+
+
+def _parser_version() -> str:
+    """
+    Hash of the parsing code (and the year it runs in), so fingerprints
+    taken before a parser change never match pages parsed after it.
+    """
+    digest = hashlib.sha256(str(CURRENT_YEAR).encode())
+    for module in (car, parsers, extractors, finance):
+        digest.update(Path(module.__file__).read_bytes())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()
+
+
+PARSER_VERSION = _parser_version()
+
+
+def listing_fingerprint(html: str) -> str | None:
+    """
+    Hash of the parts of the page parse_listing reads, ignoring markup and
+    whitespace, so ads or scripts changing don't count as a listing change.
+    Much cheaper than parsing. None when lxml is not installed.
+    """
+    if lxml_html is None:
+        return None
+    digest = hashlib.sha256(PARSER_VERSION.encode())
+    for node in lxml_html.fromstring(html).xpath(FINGERPRINT_XPATH):
+        text = node if isinstance(node, str) else " ".join(node.text_content().split())
+        digest.update(text.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
 
 def parse_listing(html: str, url: str) -> CarListing:
     """
     Converts raw SGCarMart HTML into a structured CarListing.
     """
 
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, HTML_PARSER)
     missing_fields: list[str] = []
 
-    raw = {}
-
-    # Extract title using multiple strategies
-    raw["Title"] = extract_title(soup)
-
-    # Extract generic detail blocks
-    items = soup.find_all("div", class_=re.compile(r"styles_item__"))
-    for item in items:
-        title = item.find("div", class_=re.compile(r"styles_detailTitle__"))
-        value = item.find("div", class_=re.compile(r"styles_descContainer__"))
-        if title and value:
-            raw[title.text.strip()] = value.get_text(" ", strip=True)
-
-    # Extract Category
-    category_items = soup.find_all("div", class_=re.compile(r"styles_item__"))
-    for item in category_items:
-        title_div = item.find("div", class_=re.compile(r"styles_titleContainer__"))
-        if title_div and title_div.text.strip() == "Category":
-            desc_div = item.find("div", class_=re.compile(r"styles_descContainer__"))
-            if desc_div:
-                raw["Category"] = desc_div.get_text(strip=True)
-            break
+    raw, image_urls = extract_raw_fields(soup)
 
     # Manufactured year with fallbacks
     manufactured_year = extract_manufactured_year(raw)
@@ -103,8 +213,8 @@ def parse_listing(html: str, url: str) -> CarListing:
             coe_left = coe_part
 
             # Use regex to extract years and months regardless of format
-            years_match = re.search(r"(\d+)\s*(?:y|yr|yrs|year|years)", coe_left, re.IGNORECASE)
-            months_match = re.search(r"(\d+)\s*(?:m|mth|mths|month|months)", coe_left, re.IGNORECASE)
+            years_match = COE_YEARS_RE.search(coe_left)
+            months_match = COE_MONTHS_RE.search(coe_left)
 
             years = int(years_match.group(1)) if years_match else 0
             months = int(months_match.group(1)) if months_match else 0
@@ -122,12 +232,8 @@ def parse_listing(html: str, url: str) -> CarListing:
     # Loan term and monthly calculations
     loan_term = calculate_loan_term(coe_left_months) if coe_left_months else None
 
-    zero_dp = calculate_monthly(price, loan_term, 0.0, 4.98) if price and loan_term else None
-    dp_10k = calculate_monthly(price, loan_term, 10000.0, 4.0) if price and loan_term else None
-    dp_20k = calculate_monthly(price, loan_term, 20000.0, 3.5) if price and loan_term else None
-    dp_30k = calculate_monthly(price, loan_term, 30000.0, 3.5) if price and loan_term else None
-    dp_40k = calculate_monthly(price, loan_term, 40000.0, 3.0) if price and loan_term else None
-    dp_50k = calculate_monthly(price, loan_term, 50000.0, 3.0) if price and loan_term else None
+    # *_dp_monthly fields from the configured rate table (recomputed on cache reads)
+    financing = apply_financing([{"price": price, "loan_term_months": loan_term}])[0]
 
     # Depreciation
     depreciation = parse_price(raw.get("Depreciation", "").split(" ")[0], missing_fields, "Depreciation")
@@ -135,19 +241,6 @@ def parse_listing(html: str, url: str) -> CarListing:
     # Road tax
     road_tax = parse_price(raw.get("Road Tax", "").split(" ")[0], missing_fields, "Road Tax")
 
-    # Image URLs
-    image_urls = []
-
-    for img in soup.find_all("img", class_="carousel_image"):
-        src = img.get("src")
-        if not src:
-            continue
-
-        image_urls.append(src)
-
-    # Deduplicate while preserving order
-    image_urls = list(dict.fromkeys(image_urls))
-
     # Build model name with fallbacks (near the end, before return)
     model = build_model_name(raw, manufactured_year, url, missing_fields)
 
@@ -161,12 +254,12 @@ def parse_listing(html: str, url: str) -> CarListing:
         reg_date=reg_date_str,
         coe_left=coe_left_str,
         loan_term_months=loan_term,
-        zero_dp_monthly=zero_dp,
-        tenk_dp_monthly=dp_10k,
-        twentyk_dp_monthly=dp_20k,
-        thirtyk_dp_monthly=dp_30k,
-        fortyk_dp_monthly=dp_40k,
-        fiftyk_dp_monthly=dp_50k,
+        zero_dp_monthly=financing["zero_dp_monthly"],
+        tenk_dp_monthly=financing["tenk_dp_monthly"],
+        twentyk_dp_monthly=financing["twentyk_dp_monthly"],
+        thirtyk_dp_monthly=financing["thirtyk_dp_monthly"],
+        fortyk_dp_monthly=financing["fortyk_dp_monthly"],
+        fiftyk_dp_monthly=financing["fiftyk_dp_monthly"],
         mileage=parse_mileage(raw.get("Mileage", ""), missing_fields),
         no_owners=raw.get("No. of Owners"),
         curb_weight_kg=curb_weight,
@@ -0,0 +1,152 @@
+import asyncio
+import uuid
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import PRECACHE_WORKERS, PRECACHE_BATCH_SIZE, PRECACHE_MAX_JOBS
+from app.db.cache import upsert_listings
+from app.db.connection import run_db
+from app.services.scraper import collect_listings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrecacheJob:
+    id: str
+    urls: list[str]
+    status: str = "queued"  # queued | running | done
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    finished_at: Optional[str] = None
+    cached_urls: list[str] = field(default_factory=list)
+    failed_urls: list[str] = field(default_factory=list)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.urls) - len(self.cached_urls) - len(self.failed_urls)
+
+
+class PrecacheQueue:
+    """
+    Background precaching: jobs are queued by URL, workers scrape queued
+    URLs in batches and write them to the listings cache. A URL that is
+    already queued or being scraped is attached to the existing job
+    instead of being queued twice.
+    """
+
+    def __init__(self, workers: int = PRECACHE_WORKERS, batch_size: int = PRECACHE_BATCH_SIZE, max_jobs: int = PRECACHE_MAX_JOBS):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, PrecacheJob] = OrderedDict()
+        self._waiting: dict[str, list[PrecacheJob]] = {}  # url -> jobs waiting on it
+        self._pending: deque[str] = deque()                # urls not yet picked up
+        self._wakeup = None
+        self._tasks: list[asyncio.Task] = []
+        self._stats = {"jobs": 0, "urls_queued": 0, "urls_merged": 0, "batches": 0, "cached": 0, "failed": 0}
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def enqueue(self, urls: list[str]) -> PrecacheJob:
+        """
+        Queues urls and returns the job tracking them. If every URL is
+        already queued by a single earlier job, that job is returned.
+        """
+        urls = list(dict.fromkeys(urls))
+        if urls and all(url in self._waiting for url in urls):
+            owners = {self._waiting[url][0].id for url in urls}
+            if len(owners) == 1:
+                self._stats["urls_merged"] += len(urls)
+                return self._waiting[urls[0]][0]
+
+        job = PrecacheJob(id=uuid.uuid4().hex, urls=urls)
+        self._jobs[job.id] = job
+        self._stats["jobs"] += 1
+
+        for url in urls:
+            if url in self._waiting:
+                self._stats["urls_merged"] += 1
+            else:
+                self._waiting[url] = []
+                self._pending.append(url)
+                self._stats["urls_queued"] += 1
+            self._waiting[url].append(job)
+
+        self._prune()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def is_pending(self, url: str) -> bool:
+        """True when url is queued or being scraped."""
+        return url in self._waiting
+
+    def get(self, job_id: str) -> Optional[PrecacheJob]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["pending_urls"] = len(self._pending)
+        stats["in_progress_urls"] = len(self._waiting) - len(self._pending)
+        stats["workers"] = len(self._tasks)
+        return stats
+
+    async def _worker(self, worker_id: int):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            for url in batch:
+                for job in self._waiting.get(url, []):
+                    job.status = "running"
+
+            self._stats["batches"] += 1
+            logger.info(f"[PRECACHE] Worker {worker_id} scraping {len(batch)} URL(s)")
+            try:
+                scraped, failed_urls = await collect_listings(batch, client="precache")
+                await run_db(upsert_listings, [listing.model_dump() for listing in scraped if listing and listing.url])
+            except Exception as e:
+                logger.error(f"[PRECACHE] Batch failed: {e}")
+                scraped, failed_urls = [], batch
+
+            failed = set(failed_urls)
+            for url in batch:
+                self._finish(url, url not in failed)
+
+    def _finish(self, url: str, cached: bool):
+        self._stats["cached" if cached else "failed"] += 1
+        for job in self._waiting.pop(url, []):
+            (job.cached_urls if cached else job.failed_urls).append(url)
+            if job.remaining == 0:
+                job.status = "done"
+                job.finished_at = datetime.now(timezone.utc).isoformat()
+
+    def _prune(self):
+        """Drops the oldest finished jobs beyond max_jobs."""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].status == "done":
+                del self._jobs[job_id]
+                excess -= 1
+
+
+# Global instance
+precache_queue = PrecacheQueue()
@@ -1,41 +1,163 @@
 import time
-from collections import defaultdict
-from threading import Lock
+import math
+import logging
+
+from app.core.config import DATA_DIR, RATE_LIMIT_BACKEND, RATE_LIMIT_SWEEP_SECONDS
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.db.connection import connect, run_db
+
+logger = logging.getLogger(__name__)
+
+# Token bucket stored as its "theoretical arrival time" (GCRA): each URL
+# pushes tat forward by window/max_urls seconds, and a request is refused
+# when that would put tat more than one window ahead of now. One float per
+# key; a key whose tat has passed is back to a full allowance and can go.
+
+# Slack for float rounding, so exactly max_urls URLs always fit in a window
+EPSILON = 1e-6
+
+
+def _gcra(tat: float | None, now: float, max_urls: int, window_seconds: int, url_count: int) -> tuple[bool, int, float | None]:
+    """Returns (allowed, seconds_until_allowed, new_tat)."""
+    if url_count > max_urls:
+        # Can never fit; matches the old behaviour of asking for a full window
+        return False, window_seconds, tat
+    interval = window_seconds / max_urls
+    start = max(tat or now, now)
+    new_tat = start + url_count * interval
+    if new_tat - now > window_seconds + EPSILON:
+        return False, math.ceil(new_tat - now - window_seconds), tat
+    return True, 0, new_tat
+
+
+class MemoryBackend:
+    """
+    Per-process limits in a dict. Only touched from the event loop, so no
+    lock is needed.
+    """
+
+    def __init__(self):
+        self._tats: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    async def check(self, key: str, now: float, max_urls: int, window_seconds: int, url_count: int) -> tuple[bool, int]:
+        allowed, wait_time, new_tat = _gcra(self._tats.get(key), now, max_urls, window_seconds, url_count)
+        if allowed:
+            self._tats[key] = new_tat
+        return allowed, wait_time
+
+    async def sweep(self, now: float) -> int:
+        idle = [key for key, tat in self._tats.items() if tat <= now]
+        for key in idle:
+            del self._tats[key]
+        return len(idle)
+
+
+class SQLiteBackend:
+    """
+    Limits shared by every worker process through a small SQLite table.
+    Each check is one atomic UPSERT, run on the DB thread pool.
+    """
+
+    DB_PATH = DATA_DIR / "rate_limits.db"
+
+    # Same arithmetic as _gcra in one atomic statement; SET expressions see
+    # the old row, so `ok` records whether this request fitted
+    CHECK_SQL = """
+    INSERT INTO rate_limits (key, tat, ok)
+    VALUES (:key, :now + :cost, 1)
+    ON CONFLICT(key) DO UPDATE SET
+        tat = CASE WHEN max(tat, :now) + :cost - :now <= :window THEN max(tat, :now) + :cost ELSE tat END,
+        ok = max(tat, :now) + :cost - :now <= :window
+    RETURNING tat, ok
+    """
 
-class RateLimiter:
     def __init__(self):
-        self._requests: dict[str, list[float]] = defaultdict(list)
-        self._lock = Lock()
-    
-    def is_allowed(self, key: str, max_urls: int, window_seconds: int, url_count: int) -> tuple[bool, int]:
+        self._size = 0
+        self._ready = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _conn(self):
+        conn = connect(self.DB_PATH)
+        if not self._ready:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL, ok INTEGER NOT NULL) WITHOUT ROWID")
+            self._ready = True
+        return conn
+
+    def _check(self, key, now, max_urls, window_seconds, url_count) -> tuple[bool, int]:
+        if url_count > max_urls:
+            return False, window_seconds
+        cost = url_count * window_seconds / max_urls
+        with self._conn() as conn:
+            tat, ok = conn.execute(self.CHECK_SQL, {"key": key, "now": now, "cost": cost, "window": window_seconds + EPSILON}).fetchone()
+        if ok:
+            return True, 0
+        return False, math.ceil(max(tat, now) + cost - now - window_seconds)
+
+    def _sweep(self, now) -> int:
+        with self._conn() as conn:
+            deleted = conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,)).rowcount
+            (self._size,) = conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()
+        return deleted
+
+    async def check(self, key: str, now: float, max_urls: int, window_seconds: int, url_count: int) -> tuple[bool, int]:
+        return await run_db(self._check, key, now, max_urls, window_seconds, url_count)
+
+    async def sweep(self, now: float) -> int:
+        return await run_db(self._sweep, now)
+
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend}
+
+
+class RateLimiter:
+    """
+    Limits how many URLs a key (client IP) may submit per window, as a
+    token bucket holding `max_urls` that refills over `window_seconds`.
+    Each limit a key is checked against (e.g. free and premium) has its own
+    bucket, since a URL costs a different share of each. Checks are O(1);
+    buckets that have fully refilled are swept every `sweep_seconds`.
+    `clock` returns the current time in seconds.
+    """
+
+    def __init__(self, backend: str = RATE_LIMIT_BACKEND, sweep_seconds: float = RATE_LIMIT_SWEEP_SECONDS, clock=time.time):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown rate limit backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+        self.backend_name = backend
+        self._backend = BACKENDS[backend]()
+        self.sweep_seconds = sweep_seconds
+        self._clock = clock
+        self._last_sweep = clock()
+        self._stats = {"checks": 0, "rejected": 0, "swept_keys": 0}
+
+    async def is_allowed(self, key: str, max_urls: int, window_seconds: int, url_count: int) -> tuple[bool, int]:
         """
         Check if request is allowed based on URL count within time window.
         Returns (is_allowed, seconds_until_reset).
         """
-        now = time.time()
-        
-        with self._lock:
-            # Clean old entries
-            self._requests[key] = [
-                (ts, count) for ts, count in self._requests[key]
-                if now - ts < window_seconds
-            ]
-            
-            # Calculate total URLs in window
-            total_urls = sum(count for _, count in self._requests[key])
-            
-            if total_urls + url_count > max_urls:
-                # Find when the oldest request expires
-                if self._requests[key]:
-                    oldest = min(ts for ts, _ in self._requests[key])
-                    wait_time = int(window_seconds - (now - oldest)) + 1
-                else:
-                    wait_time = window_seconds
-                return False, wait_time
-            
-            # Record this request
-            self._requests[key].append((now, url_count))
-            return True, 0
+        now = self._clock()
+        if now - self._last_sweep >= self.sweep_seconds:
+            self._last_sweep = now
+            self._stats["swept_keys"] += await self._backend.sweep(now)
+
+        bucket = f"{key}|{max_urls}/{window_seconds}"
+        allowed, wait_time = await self._backend.check(bucket, now, max_urls, window_seconds, url_count)
+        self._stats["checks"] += 1
+        self._stats["rejected"] += not allowed
+        if not allowed:
+            RATE_LIMIT_REJECTIONS.inc()
+        return allowed, wait_time
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["backend"] = self.backend_name
+        stats["keys"] = len(self._backend)
+        return stats
 
 # Global instance
-rate_limiter = RateLimiter()
\ No newline at end of file
+rate_limiter = RateLimiter()
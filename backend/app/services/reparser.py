@@ -0,0 +1,139 @@
+"""
+Rebuilds the listings cache from stored HTML snapshots, without touching
+the network: after a parser fix, every snapshotted listing is parsed again
+and written back. A listing keeps its scraped_at if it was refreshed (e.g.
+answered 304) after its snapshot was taken. No listing_history rows are
+written, since the page did not change; the validators move to the new
+parser version, so live scrapes go back to conditional requests.
+
+    python -m app.services.reparser                 # offline, from backend/
+    POST /admin/reparse                             # inside the running app
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from app.core.config import REPARSE_BATCH_SIZE
+from app.db.cache import init_cache_db, save_reparsed_fingerprints, upsert_listings
+from app.db.connection import close_all, run_db
+from app.db.snapshots import init_snapshot_db, list_snapshots, load_snapshot
+from app.services.parse_pool import parse_pool
+from app.services.parser import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def _load_batch(rows) -> list[tuple[str, str | None, str | None, datetime]]:
+    """(url, html, error, fetched_at) for each snapshot row."""
+    pages = []
+    for url, sha256, codec, fetched_at in rows:
+        try:
+            pages.append((url, load_snapshot(sha256, codec), None, datetime.fromisoformat(fetched_at)))
+        except Exception as e:
+            pages.append((url, None, f"{type(e).__name__}: {e}", datetime.fromisoformat(fetched_at)))
+    return pages
+
+
+class Reparser:
+    """
+    One reparse job at a time. Snapshots are read in URL order in batches
+    and parsed in parallel on the parse pool; each batch is written to the
+    cache in one transaction.
+    """
+
+    def __init__(self, batch_size: int = REPARSE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._task = None
+        self._last_run = None
+        self._progress = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "progress": dict(self._progress) if self._progress else None,
+            "last_run": self._last_run,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> bool:
+        """Starts a background reparse. Returns False if one is already running."""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self.run())
+        return True
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def run(self) -> dict:
+        """Re-parses every snapshot. Returns the run's totals."""
+        progress = self._progress = {"snapshots": 0, "parsed": 0, "failed": 0, "started_at": time.time()}
+        logger.info("[REPARSE] Starting")
+        after_url = ""
+        try:
+            while rows := await run_db(list_snapshots, after_url, self.batch_size):
+                after_url = rows[-1][0]
+                pages = await run_db(_load_batch, rows)
+                results = await asyncio.gather(
+                    *(parse_pool.parse_if_changed(html, url, None) for url, html, error, _ in pages if html is not None),
+                    return_exceptions=True,
+                )
+
+                listings, fetched_at, fingerprints = [], {}, {}
+                loaded = [(url, at) for url, html, _, at in pages if html is not None]
+                for (url, at), result in zip(loaded, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"[REPARSE] Parse failed for {url}: {result}")
+                        continue
+                    listing, fingerprint = result
+                    listing = listing.model_dump()
+                    if listing.get("url"):
+                        listings.append(listing)
+                        fetched_at[listing["url"]] = at
+                        fingerprints[url] = fingerprint
+                for url, _, error, _ in pages:
+                    if error:
+                        logger.error(f"[REPARSE] Snapshot unreadable for {url}: {error}")
+                await run_db(upsert_listings, listings, fetched_at, False)
+                await run_db(save_reparsed_fingerprints, fingerprints, PARSER_VERSION)
+
+                progress["snapshots"] += len(rows)
+                progress["parsed"] += len(listings)
+                progress["failed"] += len(rows) - len(listings)
+        finally:
+            progress["seconds"] = round(time.time() - progress.pop("started_at"), 2)
+            self._last_run, self._progress = progress, None
+        logger.info(f"[REPARSE] Done | {progress}")
+        return progress
+
+
+# Global instance
+reparser = Reparser()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the listings cache from stored HTML snapshots")
+    parser.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+    init_cache_db()
+    init_snapshot_db()
+    parse_pool.start()
+    try:
+        print(asyncio.run(Reparser(args.batch_size).run()))
+    finally:
+        parse_pool.close()
+        close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,21 @@
 import asyncio
 import time
 import logging
-from playwright.async_api import async_playwright
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from app.services.parser import parse_listing
+from app.core.config import FETCH_MODE, PAGE_WAIT_MODE, SNAPSHOTS_ENABLED, CHANGE_DETECTION_ENABLED
+from app.core.metrics import STAGE_ERRORS, STAGE_SECONDS
+from app.db.cache import get_previous_scrape, save_validators
+from app.db.connection import run_db
+from app.db.snapshots import save_snapshot
+from app.models.car import CarListing
+from app.services.parse_pool import parse_pool
+from app.services.parser import PARSER_VERSION
+from app.services.browser_pool import browser_pool
+from app.services.http_fetcher import http_fetcher
+from app.services.fetch_scheduler import FetchSlot, fetch_scheduler
+from app.services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -15,45 +25,234 @@ class ScrapeResult:
     url: str
     success: bool
     error: Optional[str] = None
+    listing: Optional[CarListing] = None
+    source: Optional[str] = None
 
 
-async def fetch_html(context, url: str, semaphore: asyncio.Semaphore) -> tuple[str, str, Optional[str]]:
-    """Fetch HTML with concurrency control. Returns (url, html, error)."""
-    async with semaphore:
-        start = time.time()
-        logger.info(f"[FETCH] Starting: {url}")
-        
-        page = await context.new_page()
-        try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            logger.info(f"[FETCH] Page loaded in {time.time() - start:.2f}s: {url}")
+# Blocks parse_listing reads; "parseable" wait mode returns once all are in the DOM
+PARSEABLE_JS = """() => ['styles_item__', 'styles_titleContainer__', 'styles_descContainer__']
+    .every(c => document.querySelector(`div[class*='${c}']`))"""
 
+
+async def _transferred_bytes(requests) -> int:
+    sizes = await asyncio.gather(*(r.sizes() for r in requests), return_exceptions=True)
+    return sum(
+        s["responseHeadersSize"] + s["responseBodySize"]
+        for s in sizes if isinstance(s, dict)
+    )
+
+
+async def fetch_html(context, url: str, slot: Optional[FetchSlot] = None, wait_mode: str = PAGE_WAIT_MODE) -> tuple[str, str, Optional[str]]:
+    """Fetch HTML in the browser. Returns (url, html, error)."""
+    start = time.time()
+    logger.info(f"[FETCH] Starting: {url}")
+    
+    page = await context.new_page()
+    finished = []
+    page.on("requestfinished", finished.append)
+    stage = "page_goto"
+    try:
+        if wait_mode == "parseable":
+            # Don't wait for the rest of the document once the detail blocks are in
+            with STAGE_SECONDS.time(stage):
+                response = await page.goto(url, wait_until="commit", timeout=30000)
+            stage = "selector_wait"
+            try:
+                with STAGE_SECONDS.time(stage):
+                    await page.wait_for_function(PARSEABLE_JS, timeout=10000)
+            except:
+                pass
+        else:
+            with STAGE_SECONDS.time(stage):
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        if slot is not None and response is not None:
+            slot.status = response.status
+        logger.info(f"[FETCH] Page loaded in {time.time() - start:.2f}s: {url}")
+
+        if wait_mode != "parseable":
             # Wait for selector but don't block for full timeout
+            stage = "selector_wait"
             try:
-                await page.wait_for_selector(
-                    "div[class*='styles_titleContainer__']",
-                    timeout=2000
-                )
+                with STAGE_SECONDS.time(stage):
+                    await page.wait_for_selector(
+                        "div[class*='styles_titleContainer__']",
+                        timeout=2000
+                    )
             except:
                 pass
 
+        stage = "page_content"
+        with STAGE_SECONDS.time(stage):
             html = await page.content()
-            logger.info(f"[FETCH] Complete in {time.time() - start:.2f}s: {url}")
-            return (url, html, None)
-        except Exception as e:
-            logger.error(f"[FETCH] Failed in {time.time() - start:.2f}s: {url} - {e}")
-            return (url, "", str(e))
-        finally:
-            await page.close()
+        elapsed = time.time() - start
+        nbytes = await _transferred_bytes(finished)
+        browser_pool.record_page_load(wait_mode, elapsed, nbytes, len(finished))
+        logger.info(f"[FETCH] Complete in {elapsed:.2f}s ({nbytes / 1024:.0f} KB, {len(finished)} requests): {url}")
+        return (url, html, None)
+    except Exception as e:
+        STAGE_ERRORS.inc(stage)
+        logger.error(f"[FETCH] Failed in {time.time() - start:.2f}s: {url} - {e}")
+        return (url, "", str(e))
+    finally:
+        await page.close()
 
 
 MAX_SAFE_URLS = 20
-MAX_CONCURRENT = 3
+
+# How each URL was fetched: "http" (fast path), "browser" (browser-only mode),
+# "fallback" (fast path missed, browser used), "not_modified" (conditional
+# request answered 304) or "failed"
+FETCH_SOURCES = {"http": 0, "browser": 0, "fallback": 0, "not_modified": 0, "failed": 0}
+
+# Fetched pages whose fingerprint matched the stored one ("unchanged", parse
+# skipped) or not ("changed"); "new" pages had no stored fingerprint
+PAGE_CHANGES = {"new": 0, "changed": 0, "unchanged": 0}
+
+
+# Concurrent requests for the same URL (across all callers) share one scrape
+scrape_flights = SingleFlight()
+
+
+def scrape_flight_stats() -> dict:
+    stats = scrape_flights.stats()
+    stats["fetches_saved"] = stats.pop("coalesced")
+    return stats
+
+
+def fetch_source_stats() -> dict:
+    total = sum(FETCH_SOURCES.values())
+    stats = dict(FETCH_SOURCES)
+    stats["browser_avoided_ratio"] = round((FETCH_SOURCES["http"] + FETCH_SOURCES["not_modified"]) / total, 4) if total else None
+    return stats
+
+
+def change_detection_stats() -> dict:
+    stats = dict(PAGE_CHANGES)
+    stats["not_modified"] = FETCH_SOURCES["not_modified"]
+    refetched = stats["changed"] + stats["unchanged"] + stats["not_modified"]
+    stats["parse_skipped_ratio"] = round((stats["unchanged"] + stats["not_modified"]) / refetched, 4) if refetched else None
+    return stats
+
+
+async def fetch_listing_html(
+    url: str, client: str = "anonymous", mode: str = FETCH_MODE, validators: Optional[dict] = None
+) -> tuple[str, str, Optional[str], str, dict]:
+    """
+    Fetch HTML via the HTTP fast path, falling back to the browser when the
+    raw markup is not enough. Waits for a fetch_scheduler slot first. A
+    browser fetch gets its own context, which it closes when done. The
+    fast path is a conditional request when `validators` carries an etag or
+    last_modified; source is then "not_modified" if the page is unchanged.
+    Returns (url, html, error, source, validators received).
+    """
+    received = {}
+    async with fetch_scheduler.slot(url, client) as slot:
+        http_error = None
+        if mode != "browser":
+            html, http_error, slot.status, received = await http_fetcher.fetch(url, validators)
+            if slot.status == 304:
+                source, error = "not_modified", None
+            elif html:
+                source, error = "http", None
+            elif mode == "http":
+                source, error = "failed", http_error
+
+        if mode == "browser" or (mode != "http" and http_error):
+            async with browser_pool.context() as context:
+                url, html, error = await fetch_html(context, url, slot)
+            if error:
+                source = "failed"
+            else:
+                source = "browser" if mode == "browser" else "fallback"
+
+    FETCH_SOURCES[source] += 1
+    logger.info(f"[FETCH] Source for {url}: {source}" + (f" (http: {http_error})" if http_error else ""))
+    return (url, html or "", error, source, received)
 
 
-async def scrape_listings(urls: list[str]) -> tuple[list, list[str]]:
+async def _save_snapshot(url: str, html: str):
+    try:
+        await run_db(save_snapshot, url, html)
+    except Exception as e:
+        logger.error(f"[SNAPSHOT] Save failed for {url}: {e}")
+
+
+async def scrape_one(url: str, client: str = "anonymous") -> ScrapeResult:
+    """
+    Fetch and parse a single URL. A URL scraped before is fetched
+    conditionally and only parsed if its detail blocks changed; otherwise
+    the stored listing is returned (and re-cached by the caller, which
+    only moves its scraped_at). Never raises: any failure is returned as
+    an unsuccessful ScrapeResult, so one bad URL can't fail the batch.
+    """
+    try:
+        return await _scrape_one(url, client)
+    except Exception as e:
+        logger.error(f"[SCRAPER] Failed for {url}: {e!r}")
+        return ScrapeResult(url=url, success=False, error=f"{type(e).__name__}: {e}")
+
+
+async def _scrape_one(url: str, client: str) -> ScrapeResult:
+    previous = await run_db(get_previous_scrape, url) if CHANGE_DETECTION_ENABLED else None
+    validators, stored = previous or ({}, None)
+    if validators.get("parser_version") != PARSER_VERSION:
+        # Stored by another parser: a 304 must not hand its listing back
+        validators = {"fingerprint": validators.get("fingerprint")}
+
+    url, html, fetch_error, source, received = await fetch_listing_html(url, client, validators=validators)
+    if source == "not_modified":
+        await run_db(save_validators, url, validators["fingerprint"], received.get("etag"), received.get("last_modified"), PARSER_VERSION)
+        logger.info(f"[SCRAPER] Not modified, reusing stored listing: {url}")
+        return ScrapeResult(url=url, success=True, listing=CarListing(**stored), source=source)
+
+    if fetch_error or not html:
+        logger.error(f"[SCRAPER] Fetch failed for {url}: {fetch_error}")
+        return ScrapeResult(url=url, success=False, error=fetch_error or "empty page", source=source)
+
+    # Keep the page for offline re-parsing; it is stored while it is parsed
+    snapshot = asyncio.create_task(_save_snapshot(url, html)) if SNAPSHOTS_ENABLED else None
+    parse_start = time.time()
+    try:
+        with STAGE_SECONDS.time("parse_listing"):
+            if CHANGE_DETECTION_ENABLED:
+                listing, fingerprint = await parse_pool.parse_if_changed(html, url, validators.get("fingerprint"))
+            else:
+                listing = await parse_pool.parse(html, url)
+    except Exception as e:
+        STAGE_ERRORS.inc("parse_listing")
+        logger.error(f"[SCRAPER] Parse failed for {url}: {e}")
+        return ScrapeResult(url=url, success=False, error=f"parse failed: {e}", source=source)
+    finally:
+        if snapshot is not None:
+            await snapshot
+
+    if CHANGE_DETECTION_ENABLED:
+        await run_db(save_validators, url, fingerprint, received.get("etag"), received.get("last_modified"), PARSER_VERSION)
+        if listing is None:
+            PAGE_CHANGES["unchanged"] += 1
+            logger.info(f"[SCRAPER] Unchanged in {time.time() - parse_start:.2f}s, parse skipped: {url}")
+            return ScrapeResult(url=url, success=True, listing=CarListing(**stored), source=source)
+        PAGE_CHANGES["changed" if stored else "new"] += 1
+
+    logger.info(f"[SCRAPER] Parsed in {time.time() - parse_start:.2f}s: {url}")
+    return ScrapeResult(url=url, success=True, listing=listing, source=source)
+
+
+async def _scrape_shared(url: str, client: str) -> ScrapeResult:
+    """scrape_one through scrape_flights; a failure is a result for this URL, never an exception."""
+    try:
+        return await scrape_flights.do(url, lambda: scrape_one(url, client))
+    except Exception as e:
+        logger.error(f"[SCRAPER] Failed for {url}: {e!r}")
+        return ScrapeResult(url=url, success=False, error=f"{type(e).__name__}: {e}")
+
+
+async def scrape_listings(urls: list[str], client: str = "anonymous") -> AsyncIterator[ScrapeResult]:
     """
-    Scrape listings and return (results, failed_urls).
+    Scrape listings, yielding a ScrapeResult for each URL as soon as it is
+    parsed (completion order, not input order). `client` identifies the
+    caller for fair scheduling between requests. Every URL gets exactly
+    one result, failed or not.
     """
     total_start = time.time()
     logger.info(f"[SCRAPER] Starting scrape of {len(urls)} URLs")
@@ -61,55 +260,34 @@ async def scrape_listings(urls: list[str]) -> tuple[list, list[str]]:
     if len(urls) > MAX_SAFE_URLS:
         raise ValueError("URL batch exceeds limit.")
 
-    browser_start = time.time()
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-                "--no-zygote",
-                "--single-process",
-                "--disable-software-rasterizer",
-            ]
-        )
-        logger.info(f"[SCRAPER] Browser launched in {time.time() - browser_start:.2f}s")
-        
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-
-        # Use semaphore to limit concurrent fetches
-        semaphore = asyncio.Semaphore(MAX_CONCURRENT)
-        
-        # Fetch all URLs in parallel (limited by semaphore)
-        fetch_start = time.time()
-        tasks = [fetch_html(context, url, semaphore) for url in urls]
-        fetched = await asyncio.gather(*tasks)
-        logger.info(f"[SCRAPER] All fetches complete in {time.time() - fetch_start:.2f}s")
-
-        await browser.close()
-
-    # Parse results, track failures
-    parse_start = time.time()
-    results = []
-    failed_urls = []
-    
-    for url, html, fetch_error in fetched:
-        if fetch_error or not html:
-            failed_urls.append(url)
-            logger.error(f"[SCRAPER] Fetch failed for {url}: {fetch_error}")
-            continue
-        try:
-            results.append(parse_listing(html, url))
-        except Exception as e:
-            failed_urls.append(url)
-            logger.error(f"[SCRAPER] Parse failed for {url}: {e}")
-            continue
-    
-    logger.info(f"[SCRAPER] Parsing complete in {time.time() - parse_start:.2f}s")
-    logger.info(f"[SCRAPER] Total time: {time.time() - total_start:.2f}s | Success: {len(results)} | Failed: {len(failed_urls)}")
+    succeeded = 0
+    # Fetch all URLs in parallel (limited by the process-wide fetch
+    # scheduler); each page is handed to the parse pool as soon as its own
+    # fetch finishes. A URL already being scraped by another request is
+    # awaited instead. Shared scrapes outlive the request that started
+    # them, so nothing they use may belong to this call.
+    tasks = [asyncio.create_task(_scrape_shared(url, client)) for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            succeeded += result.success
+            yield result
+    finally:
+        # The consumer stopped early (e.g. client disconnected)
+        for task in tasks:
+            task.cancel()
+
+    logger.info(f"[SCRAPER] Total time: {time.time() - total_start:.2f}s | Success: {succeeded} | Failed: {len(urls) - succeeded}")
+
+
+async def collect_listings(urls: list[str], client: str = "anonymous") -> tuple[list[CarListing], list[str]]:
+    """
+    Scrape listings and return (results, failed_urls), both in input order.
+    """
+    by_url = {}
+    async for result in scrape_listings(urls, client):
+        by_url[result.url] = result
 
+    results = [by_url[url].listing for url in urls if by_url[url].success]
+    failed_urls = [url for url in urls if not by_url[url].success]
     return results, failed_urls
@@ -0,0 +1,32 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller starts
+    the work and later callers await the same in-flight task instead of
+    starting their own.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._stats = {"started": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn):
+        """Returns the result of `await fn()`, shared with concurrent callers of `key`."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._stats["started"] += 1
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shield: a caller going away must not cancel the work for the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["in_flight"] = len(self._inflight)
+        return stats
@@ -5,13 +5,18 @@ from urllib.parse import urlparse
 
 CURRENT_YEAR = datetime.now().year
 
+MODEL_SLUG_RE = re.compile(r"/info/([^/]+)-\d+$")
+TITLE_LINK_CLASS_RE = re.compile(r"styles_link_color__")
+COE_SUFFIX_RE = re.compile(r"\s*\(COE\s+till\s+\d{2}/\d{4}\)", re.IGNORECASE)
+YEAR_RE = re.compile(r"(\d{4})")
+
 
 def extract_model_from_url(url: str) -> str | None:
     """Extract model name from SGCarMart URL as fallback."""
     try:
         path = urlparse(url).path
         # URL format: /used-cars/info/toyota-yaris-cross-15a-1411501
-        match = re.search(r"/info/([^/]+)-\d+$", path)
+        match = MODEL_SLUG_RE.search(path)
         if match:
             model_slug = match.group(1)
             return " ".join(
@@ -27,11 +32,15 @@ def extract_title(soup: BeautifulSoup) -> str | None:
     """Extract car title from the listing link."""
     
     # Primary: Find the link with styles_link_color__ class
-    link = soup.find("a", class_=re.compile(r"styles_link_color__"))
+    return title_from_link(soup.find("a", class_=TITLE_LINK_CLASS_RE))
+
+
+def title_from_link(link) -> str | None:
+    """Clean the car title out of the listing link tag."""
     if link and link.text.strip():
         title = link.text.strip()
         # Remove COE info: "MINI Cooper S 1.6A Sunroof (COE till 04/2031)" -> "MINI Cooper S 1.6A Sunroof"
-        title = re.sub(r"\s*\(COE\s+till\s+\d{2}/\d{4}\)", "", title, flags=re.IGNORECASE)
+        title = COE_SUFFIX_RE.sub("", title)
         return title.strip()
     
     return None
@@ -43,7 +52,7 @@ def extract_manufactured_year(raw: dict) -> int | None:
     # Strategy 1: From Manufactured field
     manufactured = raw.get("Manufactured", "")
     if manufactured:
-        match = re.search(r"(\d{4})", manufactured)
+        match = YEAR_RE.search(manufactured)
         if match:
             year = int(match.group(1))
             if 1980 <= year <= CURRENT_YEAR + 1:
@@ -52,7 +61,7 @@ def extract_manufactured_year(raw: dict) -> int | None:
     # Strategy 2: From Reg Date field
     reg_date = raw.get("Reg Date", "")
     if reg_date:
-        match = re.search(r"(\d{4})", reg_date)
+        match = YEAR_RE.search(reg_date)
         if match:
             year = int(match.group(1))
             if 1980 <= year <= CURRENT_YEAR + 1:
@@ -1,6 +1,20 @@
 import math
 from datetime import datetime
 
+import numpy as np
+
+from app.core.config import FINANCE_RATES
+
+# CarListing fields filled from FINANCE_RATES, one per (down payment, rate) pair
+MONTHLY_FIELDS = [
+    "zero_dp_monthly",
+    "tenk_dp_monthly",
+    "twentyk_dp_monthly",
+    "thirtyk_dp_monthly",
+    "fortyk_dp_monthly",
+    "fiftyk_dp_monthly",
+]
+
 
 def calculate_car_age_months(date_str: str) -> int | None:
     """
@@ -44,3 +58,89 @@ def calculate_monthly(
 
     monthly = (loan_amount * total_interest_multiplier) / loan_term
     return round(monthly, 2)
+
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Rounds to 2 decimals exactly like Python's round(): np.round scales by
+    100 first, which can tip values sitting on a half cent the other way.
+    """
+    rounded = np.round(values, 2)
+    scaled = np.abs(values * 100) % 1
+    near_half = np.abs(scaled - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return rounded
+
+
+def _monthly(prices, terms, downpayments, rates) -> np.ndarray:
+    """calculate_monthly over arrays broadcast against each other."""
+    loan_amount = prices - downpayments
+    years = np.ceil(terms / 12)
+    valid = (loan_amount > 0) & (terms > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly = loan_amount * (1 + rates / 100 * years) / terms
+    return np.where(valid, _round_cents(np.where(valid, monthly, 0.0)), 0.0)
+
+
+def monthly_grid(prices, loan_terms, downpayments, interest_rates) -> np.ndarray:
+    """
+    Vectorized calculate_monthly over a whole scenario grid.
+
+    prices has shape (n,), loan_terms (n,) or (n, t); downpayments and
+    interest_rates are 1-D. Returns monthly instalments shaped
+    (n, t, downpayments, interest_rates), rounded to cents, with 0.0 where
+    the loan amount or term is not positive (as calculate_monthly does).
+    """
+    prices = np.asarray(prices, dtype=float).reshape(-1, 1, 1, 1)
+    terms = np.asarray(loan_terms, dtype=float)
+    terms = terms.reshape(terms.shape[0], -1, 1, 1)
+    downpayments = np.asarray(downpayments, dtype=float).reshape(1, 1, -1, 1)
+    rates = np.asarray(interest_rates, dtype=float).reshape(1, 1, 1, -1)
+    return _monthly(prices, terms, downpayments, rates)
+
+
+def monthly_pairs(prices, loan_terms, rate_table) -> np.ndarray:
+    """
+    calculate_monthly for each listing (prices and loan_terms, shape (n,))
+    under each (down payment, rate) pair of rate_table. Returns shape
+    (n, len(rate_table)), rounded like monthly_grid.
+    """
+    table = np.asarray(rate_table, dtype=float).reshape(-1, 2)
+    return _monthly(
+        np.asarray(prices, dtype=float).reshape(-1, 1),
+        np.asarray(loan_terms, dtype=float).reshape(-1, 1),
+        table[:, 0].reshape(1, -1),
+        table[:, 1].reshape(1, -1),
+    )
+
+
+def apply_financing(listings: list[dict], rate_table: list[tuple[float, float]] = FINANCE_RATES) -> list[dict]:
+    """
+    Fills the MONTHLY_FIELDS of listing dicts from their price and
+    loan_term_months in one NumPy pass (None when either is missing).
+    rate_table is a list of (down payment, interest rate) pairs in field order.
+    """
+    if len(rate_table) != len(MONTHLY_FIELDS):
+        raise ValueError(f"rate_table needs {len(MONTHLY_FIELDS)} pairs, got {len(rate_table)}")
+    pairs = list(zip(MONTHLY_FIELDS, rate_table))
+    financed = [
+        listing for listing in listings
+        if listing.get("price") and listing.get("loan_term_months")
+    ]
+    for listing in listings:
+        if not (listing.get("price") and listing.get("loan_term_months")):
+            for field, _ in pairs:
+                listing[field] = None
+    if not financed:
+        return listings
+
+    per_field = monthly_pairs(
+        [listing["price"] for listing in financed],
+        [listing["loan_term_months"] for listing in financed],
+        [pair for _, pair in pairs],
+    ).tolist()
+    for listing, values in zip(financed, per_field):
+        for (field, _), value in zip(pairs, values):
+            listing[field] = value
+    return listings
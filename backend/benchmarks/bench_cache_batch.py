@@ -0,0 +1,70 @@
+"""
+Per-request listings-cache DB time: one call per URL versus the batched
+get_cached_listings / upsert_listings, for 1, 10 and 20 URL requests.
+
+    python -m benchmarks.bench_cache_batch
+"""
+import json
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+
+from app.db import cache
+from benchmarks.check_parser_golden import parse_fixtures
+
+BATCH_SIZES = (1, 10, 20)
+ROUNDS = 30
+
+
+def sample_listings(count: int, offset: int = 0) -> list[dict]:
+    parsed = list(parse_fixtures().values())
+    return [
+        {**parsed[i % len(parsed)], "url": f"https://www.sgcarmart.com/used-cars/info/bench-{offset + i}"}
+        for i in range(count)
+    ]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def run() -> dict:
+    # Measure SQLite, not the in-memory tier
+    cache.memory_tier.max_entries = 0
+    cache.memory_tier.clear()
+
+    results = {}
+    for size in BATCH_SIZES:
+        timings = {"per_url_upsert": [], "batch_upsert": [], "per_url_get": [], "batch_get": []}
+        for round_no in range(ROUNDS):
+            listings = sample_listings(size, offset=round_no * size * 2)
+            urls = [listing["url"] for listing in listings]
+            timings["per_url_upsert"].append(timed(lambda: [cache.upsert_listing(l["url"], l) for l in listings]))
+            timings["per_url_get"].append(timed(lambda: [cache.get_cached_listing(url) for url in urls]))
+
+            listings = sample_listings(size, offset=round_no * size * 2 + size)
+            urls = [listing["url"] for listing in listings]
+            timings["batch_upsert"].append(timed(lambda: cache.upsert_listings(listings)))
+            timings["batch_get"].append(timed(lambda: cache.get_cached_listings(urls)))
+
+        results[size] = {name: round(median(values), 3) for name, values in timings.items()}
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache.DB_PATH = Path(tmp) / "cache.db"
+        cache.init_cache_db()
+        results = run()
+
+    print(f"{'urls':>5} | {'per-url upsert':>15} | {'batch upsert':>13} | {'per-url get':>12} | {'batch get':>10}  (median ms)")
+    for size, row in results.items():
+        print(f"{size:>5} | {row['per_url_upsert']:>15} | {row['batch_upsert']:>13} | {row['per_url_get']:>12} | {row['batch_get']:>10}")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Listings `data` column size and decode time per listing codec, against the
+JSON text it used to hold: "legacy" is the whole listing as JSON (rows from
+before the typed columns), "json" only the fields without a column. Also
+times a SQLite cache hit and reports the DB size with each codec.
+
+    python -m benchmarks.bench_listing_codec
+"""
+import json
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+
+from app.db import cache, listing_codec
+from app.models.car import CarListing
+from benchmarks.bench_cache_batch import sample_listings
+
+ROWS = 5_000
+ROUNDS = 5
+GET_BATCH = 20
+
+
+def available_codecs() -> list[str]:
+    codecs = ["json"]
+    if listing_codec.orjson is not None:
+        codecs.append("orjson")
+    if listing_codec.msgpack is not None:
+        codecs.append("msgpack")
+    return codecs
+
+
+def per_row_us(fn, rows: list) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        samples.append((time.perf_counter() - start) / len(rows) * 1_000_000)
+    return round(median(samples), 2)
+
+
+def measure_payloads(listings: list[dict]) -> dict:
+    results = {}
+    legacy = [json.dumps(listing) for listing in listings]
+    results["legacy"] = {
+        "data_bytes": round(sum(len(value.encode()) for value in legacy) / len(legacy), 1),
+        "decode_us": per_row_us(json.loads, legacy),
+        # Validating the decoded dict, as the scrape response does for every hit
+        "decode_validate_us": per_row_us(lambda value: CarListing.model_validate(json.loads(value)), legacy),
+    }
+
+    columns = [(listing["url"], cache._listing_params(listing)[1]) for listing in listings]
+    for codec in available_codecs():
+        encoded = [
+            listing_codec.encode({name: listing[name] for name in cache.DATA_FIELDS if name in listing}, codec)
+            for listing in listings
+        ]
+        rows = [(url, data, None, *values) for (url, values), data in zip(columns, encoded)]
+        results[codec] = {
+            "data_bytes": round(sum(len(value if isinstance(value, bytes) else value.encode()) for value in encoded) / len(encoded), 1),
+            "decode_us": per_row_us(listing_codec.decode, encoded),
+            "decode_validate_us": per_row_us(lambda row: CarListing.model_validate(cache._row_to_listing(row)), rows),
+        }
+    return results
+
+
+def measure_sqlite(listings: list[dict], tmp: Path) -> dict:
+    # Measure SQLite, not the in-memory tier
+    cache.memory_tier.max_entries = 0
+    cache.memory_tier.clear()
+    default_codec, default_path = listing_codec.CODEC, cache.DB_PATH
+    urls = [listing["url"] for listing in listings]
+
+    results = {}
+    try:
+        for codec in available_codecs():
+            listing_codec.CODEC = codec
+            cache.DB_PATH = tmp / f"cache_{codec}.db"
+            cache.init_cache_db()
+            for i in range(0, len(listings), 500):
+                cache.upsert_listings(listings[i:i + 500])
+
+            samples = []
+            for round_no in range(ROUNDS * 10):
+                batch = urls[round_no * GET_BATCH:(round_no + 1) * GET_BATCH]
+                start = time.perf_counter()
+                cache.get_cached_listings(batch)
+                samples.append((time.perf_counter() - start) * 1000)
+            with cache.get_conn() as conn:
+                conn.execute("VACUUM")
+            results[codec] = {
+                "get_hits_ms": round(median(samples), 3),
+                "db_mb": round(cache.DB_PATH.stat().st_size / 1024 / 1024, 2),
+            }
+    finally:
+        listing_codec.CODEC, cache.DB_PATH = default_codec, default_path
+    return results
+
+
+def main():
+    listings = sample_listings(ROWS)
+    with tempfile.TemporaryDirectory() as tmp:
+        payloads = measure_payloads(listings)
+        sqlite = measure_sqlite(listings, Path(tmp))
+
+    print(f"{'codec':>7} | {'data bytes':>10} | {'decode us':>9} | {'+validate us':>12} | {'get 20 ms':>9} | {'db MB':>6}")
+    for codec, row in payloads.items():
+        db = sqlite.get(codec, {})
+        print(
+            f"{codec:>7} | {row['data_bytes']:>10} | {row['decode_us']:>9} | {row['decode_validate_us']:>12} | "
+            f"{db.get('get_hits_ms', '-'):>9} | {db.get('db_mb', '-'):>6}"
+        )
+    print(json.dumps({"payloads": payloads, "sqlite": sqlite}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Rate limiter check latency and memory with many distinct client keys: the
+old per-key timestamp lists versus the memory and sqlite GCRA backends.
+Also counts the keys still held once every window has passed and the
+limiter has swept.
+
+    python -m benchmarks.bench_rate_limiter
+"""
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from statistics import median, quantiles
+
+from app.db.connection import connect
+from app.services import rate_limiter as limiter_module
+from app.services.rate_limiter import RateLimiter
+
+KEY_COUNTS = (10_000, 50_000)
+CHECKS_PER_KEY = 3
+MAX_URLS = 10
+WINDOW_SECONDS = 120
+
+
+class LegacyRateLimiter:
+    """The sliding-window limiter this module replaced, kept for comparison."""
+
+    def __init__(self):
+        self._requests: dict[str, list[float]] = defaultdict(list)
+
+    async def is_allowed(self, key: str, max_urls: int, window_seconds: int, url_count: int) -> tuple[bool, int]:
+        now = time.time()
+        self._requests[key] = [(ts, count) for ts, count in self._requests[key] if now - ts < window_seconds]
+        total_urls = sum(count for _, count in self._requests[key])
+        if total_urls + url_count > max_urls:
+            oldest = min((ts for ts, _ in self._requests[key]), default=now)
+            return False, int(window_seconds - (now - oldest)) + 1
+        self._requests[key].append((now, url_count))
+        return True, 0
+
+    def keys(self) -> int:
+        return len(self._requests)
+
+
+def key_count(limiter) -> int:
+    if isinstance(limiter, LegacyRateLimiter):
+        return limiter.keys()
+    if limiter.backend_name == "sqlite":
+        # stats() reports the row count as of the last sweep; count it now
+        with connect(limiter_module.SQLiteBackend.DB_PATH) as conn:
+            return conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+    return limiter.stats()["keys"]
+
+
+class Clock:
+    """time.time plus an offset the benchmark can move forward."""
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def __call__(self) -> float:
+        return time.time() + self.offset
+
+
+async def measure(limiter, keys: int, clock: Clock) -> dict:
+    latencies = []
+    tracemalloc.start()
+    for _ in range(CHECKS_PER_KEY):
+        for i in range(keys):
+            start = time.perf_counter()
+            await limiter.is_allowed(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}", MAX_URLS, WINDOW_SECONDS, 3)
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+    memory, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    held = key_count(limiter)
+
+    # Every window has passed; one more check from a new client triggers the sweep
+    clock.offset += WINDOW_SECONDS * 2
+    await limiter.is_allowed("late-client", MAX_URLS, WINDOW_SECONDS, 1)
+
+    return {
+        "median_us": round(median(latencies), 2),
+        "p99_us": round(quantiles(latencies, n=100)[98], 2),
+        "memory_mb": round(memory / 1024 / 1024, 2),
+        "keys_held": held,
+        "keys_after_window": key_count(limiter),
+    }
+
+
+async def run(tmp: Path) -> dict:
+    results = {}
+    for keys in KEY_COUNTS:
+        # Fresh table for each size
+        limiter_module.SQLiteBackend.DB_PATH = tmp / f"rate_limits_{keys}.db"
+        clocks = {name: Clock() for name in ("legacy", "memory", "sqlite")}
+        limiters = {
+            "legacy": LegacyRateLimiter(),
+            "memory": RateLimiter("memory", sweep_seconds=WINDOW_SECONDS, clock=clocks["memory"]),
+            "sqlite": RateLimiter("sqlite", sweep_seconds=WINDOW_SECONDS, clock=clocks["sqlite"]),
+        }
+        results[keys] = {name: await measure(limiter, keys, clocks[name]) for name, limiter in limiters.items()}
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run(Path(tmp)))
+
+    print(f"{'keys':>6} | {'backend':>7} | {'median us':>9} | {'p99 us':>8} | {'memory MB':>9} | {'keys held':>9} | {'after window':>12}")
+    for keys, rows in results.items():
+        for name, row in rows.items():
+            print(
+                f"{keys:>6} | {name:>7} | {row['median_us']:>9} | {row['p99_us']:>8} | "
+                f"{row['memory_mb']:>9} | {row['keys_held']:>9} | {row['keys_after_window']:>12}"
+            )
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares parse_listing output for every saved fixture page against the
+recorded golden output.
+
+    python -m benchmarks.check_parser_golden            # compare
+    python -m benchmarks.check_parser_golden --update   # re-record
+"""
+import sys
+import json
+from pathlib import Path
+
+from app.services.parser import parse_listing
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+GOLDEN_PATH = FIXTURES_DIR / "golden.json"
+
+# Listing URL each fixture was "scraped" from (the URL feeds the model fallback)
+FIXTURE_URLS = {
+    "listing_full.html": "https://www.sgcarmart.com/used-cars/info/toyota-yaris-cross-hybrid-15a-x-1411501",
+    "listing_na_heavy.html": "https://www.sgcarmart.com/used-cars/info/toyota-corolla-altis-16a-1398820",
+    "listing_missing_coe.html": "https://www.sgcarmart.com/used-cars/info/bmw-3-series-320i-m-sport-1402233",
+    "listing_malformed.html": "https://www.sgcarmart.com/used-cars/info/honda-civic-15a-vtec-turbo-1377001",
+    "listing_old_parf.html": "https://www.sgcarmart.com/used-cars/info/mercedes-benz-c-class-c180-1290457",
+}
+
+
+def fixture_pages() -> list[tuple[str, str, str]]:
+    """Returns (name, url, html) for every fixture page."""
+    return [
+        (name, url, (FIXTURES_DIR / name).read_text(encoding="utf-8"))
+        for name, url in FIXTURE_URLS.items()
+    ]
+
+
+def parse_fixtures() -> dict:
+    return {name: parse_listing(html, url).model_dump() for name, url, html in fixture_pages()}
+
+
+def main() -> int:
+    current = parse_fixtures()
+
+    if "--update" in sys.argv:
+        GOLDEN_PATH.write_text(json.dumps(current, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Recorded {len(current)} fixtures to {GOLDEN_PATH}")
+        return 0
+
+    golden = json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+    mismatches = 0
+    for name, expected in golden.items():
+        actual = current.get(name)
+        if actual is None:
+            print(f"MISSING  {name}")
+            mismatches += 1
+            continue
+        for field in sorted(set(expected) | set(actual)):
+            if expected.get(field) != actual.get(field):
+                print(f"DIFF     {name}.{field}: expected {expected.get(field)!r}, got {actual.get(field)!r}")
+                mismatches += 1
+
+    print(f"{len(golden)} fixtures checked, {mismatches} mismatch(es)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Offline benchmark suite over the saved fixture pages (full, N.A.-heavy,
+missing-COE, malformed and old-PARF listings); never touches the live site.
+
+  parse  parse_listing throughput and peak memory per fixture page
+  cache  listings-cache get/upsert latency as the DB grows
+  e2e    POST /api/scrape latency, cold and cached, against a local
+         server standing in for Sgcarmart
+
+Results are printed as one JSON document; --compare flags metrics that
+moved the wrong way by more than --threshold percent against an earlier run.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --only parse,cache --output results.json
+    python -m benchmarks.run --compare baseline.json --threshold 15
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+# Set before anything imports app.core.config: benchmarks get their own data
+# dir, never pre-warm a browser and fetch over plain HTTP only. Parse pool
+# workers inherit the environment, so they reuse the same dir.
+if "DATABASE_PATH" not in os.environ:
+    os.environ["DATABASE_PATH"] = tempfile.mkdtemp(prefix="carmetrics-bench-")
+    atexit.register(shutil.rmtree, os.environ["DATABASE_PATH"], True)
+os.environ.setdefault("BROWSER_PREWARM", "0")
+os.environ.setdefault("FETCH_MODE", "http")
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import median, quantiles
+from urllib.parse import urlsplit
+
+from app.db import cache
+from app.services.parser import parse_listing
+from benchmarks.bench_cache_batch import sample_listings
+from benchmarks.check_parser_golden import FIXTURE_URLS, fixture_pages
+
+SUITES = ("parse", "cache", "e2e")
+
+PARSE_ROUNDS = 30
+
+CACHE_DB_SIZES = (1_000, 10_000, 50_000)
+CACHE_ROUNDS = 50
+CACHE_BATCH = 10
+FILL_BATCH = 500
+
+E2E_BATCH_SIZES = (1, 10, 20)
+E2E_ROUNDS = 8
+# Simulated origin response time, so fetch concurrency shows up in the numbers
+ORIGIN_DELAY_SECONDS = 0.05
+
+
+def summarize(samples_ms: list[float]) -> dict:
+    return {
+        "median_ms": round(median(samples_ms), 3),
+        "p95_ms": round(quantiles(samples_ms, n=20)[18], 3) if len(samples_ms) > 1 else round(samples_ms[0], 3),
+    }
+
+
+def timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+# ---- parse ----
+
+def bench_parse() -> dict:
+    results = {}
+    for name, url, html in fixture_pages():
+        samples = [timed_ms(lambda: parse_listing(html, url)) for _ in range(PARSE_ROUNDS)]
+
+        tracemalloc.start()
+        parse_listing(html, url)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            **summarize(samples),
+            "pages_per_second": round(1000 / median(samples), 1),
+            "peak_memory_kb": round(peak / 1024, 1),
+            "html_kb": round(len(html.encode()) / 1024, 1),
+        }
+    return results
+
+
+# ---- cache ----
+
+def bench_cache() -> dict:
+    cache.init_cache_db()
+    # Measure SQLite, not the in-memory tier
+    max_entries = cache.memory_tier.max_entries
+    cache.memory_tier.max_entries = 0
+    cache.memory_tier.clear()
+
+    results = {}
+    rows = 0
+    try:
+        for size in CACHE_DB_SIZES:
+            while rows < size:
+                batch = min(FILL_BATCH, size - rows)
+                cache.upsert_listings(sample_listings(batch, offset=rows))
+                rows += batch
+
+            rng = random.Random(size)
+            gets, misses, upserts = [], [], []
+            for round_no in range(CACHE_ROUNDS):
+                hits = [listing["url"] for listing in sample_listings(CACHE_BATCH, offset=rng.randrange(rows - CACHE_BATCH))]
+                unknown = [f"https://www.sgcarmart.com/used-cars/info/missing-{size}-{round_no}-{i}" for i in range(CACHE_BATCH)]
+                fresh = sample_listings(CACHE_BATCH, offset=10_000_000 + size + round_no * CACHE_BATCH)
+                gets.append(timed_ms(lambda: cache.get_cached_listings(hits)))
+                misses.append(timed_ms(lambda: cache.get_cached_listings(unknown)))
+                upserts.append(timed_ms(lambda: cache.upsert_listings(fresh)))
+
+            results[str(size)] = {
+                "get_hits": summarize(gets),
+                "get_misses": summarize(misses),
+                "upsert": summarize(upserts),
+                "db_mb": round(cache.DB_PATH.stat().st_size / 1024 / 1024, 2),
+            }
+    finally:
+        cache.memory_tier.max_entries = max_entries
+    return results
+
+
+# ---- e2e ----
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves each fixture page at its listing path; the query string is ignored."""
+
+    pages: dict[str, bytes] = {}
+
+    def do_GET(self):
+        time.sleep(ORIGIN_DELAY_SECONDS)
+        body = self.pages.get(urlsplit(self.path).path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server() -> ThreadingHTTPServer:
+    FixtureHandler.pages = {
+        urlsplit(url).path: html.encode("utf-8") for _name, url, html in fixture_pages()
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_e2e() -> dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    server = start_fixture_server()
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+    paths = [urlsplit(url).path for url in FIXTURE_URLS.values()]
+
+    results = {}
+    try:
+        with TestClient(app) as client:
+            # Start the parse pool workers and HTTP connections outside the timings
+            client.post("/api/scrape", json={"urls": [f"{origin}{paths[0]}?copy=warmup"]}).raise_for_status()
+
+            for size in E2E_BATCH_SIZES:
+                cold, warm, failed = [], [], 0
+                for round_no in range(E2E_ROUNDS):
+                    urls = [f"{origin}{paths[i % len(paths)]}?copy={size}-{round_no}-{i}" for i in range(size)]
+                    # A client IP per request keeps the rate limiter out of the numbers
+                    headers = {"x-forwarded-for": f"10.{size}.{round_no}.1"}
+                    payload = {"urls": urls, "userrole": "premium"}
+
+                    start = time.perf_counter()
+                    response = client.post("/api/scrape", json=payload, headers=headers)
+                    cold.append((time.perf_counter() - start) * 1000)
+                    response.raise_for_status()
+                    failed += len(response.json()["failed_urls"])
+
+                    warm.append(timed_ms(lambda: client.post("/api/scrape", json=payload, headers=headers).raise_for_status()))
+
+                results[str(size)] = {"cold": summarize(cold), "cached": summarize(warm), "failed_urls": failed}
+    finally:
+        server.shutdown()
+    return results
+
+
+# ---- comparison ----
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold_pct: float) -> list[str]:
+    """Metrics that got worse by more than threshold_pct: *_ms up, *_per_second down."""
+    now, before = flatten(current["suites"]), flatten(baseline.get("suites", {}))
+    regressions = []
+    for path, value in now.items():
+        old = before.get(path)
+        if not old:
+            continue
+        change = (value - old) / old * 100
+        if path.endswith("_ms") and change > threshold_pct:
+            regressions.append(f"{path}: {old} -> {value} (+{change:.1f}%)")
+        elif path.endswith("_per_second") and -change > threshold_pct:
+            regressions.append(f"{path}: {old} -> {value} ({change:.1f}%)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline CarMetrics benchmarks")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--compare", help="earlier results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    suites = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+
+    runners = {"parse": bench_parse, "cache": bench_cache, "e2e": bench_e2e}
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "suites": {},
+    }
+    for name in suites:
+        print(f"Running {name}...", file=sys.stderr)
+        results["suites"][name] = runners[name]()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION  {line}", file=sys.stderr)
+        print(f"{len(regressions)} regression(s) over {args.threshold}%", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Set before anything imports app.core.config: tests get their own data dir,
+# never launch a browser and fetch over plain HTTP only
+os.environ["DATABASE_PATH"] = tempfile.mkdtemp(prefix="carmetrics-test-")
+atexit.register(shutil.rmtree, os.environ["DATABASE_PATH"], True)
+os.environ["BROWSER_PREWARM"] = "0"
+os.environ["FETCH_MODE"] = "http"
+
+from urllib.parse import urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.check_parser_golden import FIXTURE_URLS
+from benchmarks.run import start_fixture_server
+
+
+@pytest.fixture(scope="session")
+def fixture_urls():
+    """Local URLs serving the saved fixture pages."""
+    server = start_fixture_server()
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+    yield [f"{origin}{urlsplit(url).path}" for url in FIXTURE_URLS.values()]
+    server.shutdown()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
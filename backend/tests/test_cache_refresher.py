@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.db import cache
+from app.services.cache_refresher import CacheRefresher
+from app.services.precache_queue import precache_queue
+from benchmarks.bench_cache_batch import sample_listings
+
+
+def _store_expiring(listings, accessed_at):
+    """Listings 2.5 days old (expiring within REFRESH_AHEAD_HOURS) with 10 hits last read at accessed_at."""
+    now = datetime.now(timezone.utc)
+    cache.upsert_listings(listings, {listing["url"]: now - timedelta(hours=60) for listing in listings})
+    with cache.get_conn() as conn:
+        conn.executemany(
+            "UPDATE listings SET hits = 10, last_accessed = ? WHERE url = ?",
+            [(accessed_at.isoformat(), listing["url"]) for listing in listings],
+        )
+
+
+def test_only_recently_read_listings_are_refreshed(monkeypatch):
+    cache.init_cache_db()
+    now = datetime.now(timezone.utc)
+    recent, forgotten = sample_listings(2, offset=900_000)
+    _store_expiring([recent], now - timedelta(hours=1))
+    _store_expiring([forgotten], now - timedelta(days=10))
+
+    queued = []
+    monkeypatch.setattr(precache_queue, "enqueue", queued.extend)
+    refresher = CacheRefresher(ahead_hours=24, min_hits=2, batch_size=50, access_window_hours=24)
+    urls = asyncio.run(refresher.refresh_once())
+
+    assert recent["url"] in urls
+    assert forgotten["url"] not in urls
+    assert forgotten["url"] not in queued
@@ -0,0 +1,21 @@
+import pytest
+
+from app.core import metrics
+from app.main import app
+
+
+@pytest.mark.skipif(not metrics.METRICS_ENABLED, reason="metrics are disabled")
+def test_metrics_recorded_in_a_request_never_use_the_raw_path(client):
+    @app.get("/test-metrics/{item_id}")
+    def record_stage(item_id: str):
+        metrics.STAGE_SECONDS.observe(0.01, "test_stage")
+        return {}
+
+    try:
+        client.get("/test-metrics/item-123").raise_for_status()
+    finally:
+        app.router.routes.pop()
+
+    rendered = client.get("/metrics").text
+    assert 'endpoint="/test-metrics/{item_id}"' in rendered
+    assert "item-123" not in rendered
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.db import cache
+from app.db.snapshots import init_snapshot_db, save_snapshot
+from app.services.parser import PARSER_VERSION, listing_fingerprint, parse_listing
+from app.services.reparser import Reparser
+from benchmarks.check_parser_golden import fixture_pages
+
+
+def test_reparse_skips_history_and_updates_validators():
+    cache.init_cache_db()
+    init_snapshot_db()
+    _, url, html = fixture_pages()[0]
+    fetched_at = datetime.now(timezone.utc) - timedelta(hours=2)
+    save_snapshot(url, html, fetched_at)
+
+    # What an older parser stored: a different price, validators under another version
+    stale = parse_listing(html, url).model_dump()
+    stale["price"] = (stale.get("price") or 0) + 1000
+    cache.upsert_listings([stale], {url: fetched_at})
+    cache.save_validators(url, "old-fingerprint", '"etag-1"', None, "old-version")
+    with cache.get_conn() as conn:
+        history_before = conn.execute("SELECT COUNT(*) FROM listing_history WHERE url = ?", (url,)).fetchone()[0]
+
+    asyncio.run(Reparser().run())
+
+    with cache.get_conn() as conn:
+        history_after = conn.execute("SELECT COUNT(*) FROM listing_history WHERE url = ?", (url,)).fetchone()[0]
+        validators = conn.execute(
+            "SELECT fingerprint, etag, parser_version FROM listing_validators WHERE url = ?", (url,)
+        ).fetchone()
+    assert history_after == history_before
+    assert validators == (listing_fingerprint(html), '"etag-1"', PARSER_VERSION)
+    assert cache.get_cached_listings([url])[url]["price"] == parse_listing(html, url).price
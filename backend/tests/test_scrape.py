@@ -0,0 +1,41 @@
+import json
+
+BAD_URL = "http://a:badport/"
+
+
+def test_bad_url_fails_alone(client, fixture_urls):
+    good = f"{fixture_urls[0]}?case=bad-url"
+    response = client.post("/api/scrape", json={"urls": [good, BAD_URL]}, headers={"x-forwarded-for": "10.0.0.1"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [listing["url"] for listing in body["results"]] == [good]
+    assert body["failed_urls"] == [BAD_URL]
+
+
+def test_bad_url_streams_failed_record_and_summary(client, fixture_urls):
+    good = f"{fixture_urls[0]}?case=bad-url-stream"
+    response = client.post("/api/scrape/stream", json={"urls": [good, BAD_URL]}, headers={"x-forwarded-for": "10.0.0.2"})
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["url"] for record in records if record["type"] == "failed"] == [BAD_URL]
+    assert [record["listing"]["url"] for record in records if record["type"] == "listing"] == [good]
+    assert records[-1]["type"] == "summary"
+    assert records[-1]["failed_urls"] == [BAD_URL]
+
+
+def test_stream_reports_every_url_when_scraping_raises(client, fixture_urls, monkeypatch):
+    from app.api.routes import scrape
+
+    async def broken_scrape(urls, client):
+        raise RuntimeError("scraper down")
+        yield
+
+    monkeypatch.setattr(scrape, "scrape_listings", broken_scrape)
+    urls = [f"{fixture_urls[0]}?case=broken-{i}" for i in range(2)]
+    response = client.post("/api/scrape/stream", json={"urls": urls}, headers={"x-forwarded-for": "10.0.0.3"})
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["url"] for record in records if record["type"] == "failed"] == urls
+    assert records[-1] == {**records[-1], "type": "summary", "scraped": 0, "failed_urls": urls}
@@ -1,16 +1,20 @@
 "use client";
 
-import { useState, useCallback, useRef } from "react";
+import { useState, useCallback, useEffect, useRef } from "react";
 import { useRouter } from "next/navigation";
 import { scrapeCars, precacheUrl } from "@/lib/api";
 import { useResults } from "@/context/ResultsContext";
 import LinkInput from "@/components/LinkInput";
 import FinanceCard from "@/components/FinanceCard";
 import AnalyzeButton from "@/components/AnalyzeButton";
+import ResultsTable from "@/components/ResultsTable";
+import type { CarListing } from "@/lib/types";
 
 export default function QuickStart() {
   const [loading, setLoading] = useState(false);
   const [isComplete, setIsComplete] = useState(false);
+  // Listings shown as the stream delivers them, before the batch completes
+  const [streamed, setStreamed] = useState<CarListing[]>([]);
   const router = useRouter();
   const { setResults, links, setLinks } = useResults();
   
@@ -20,6 +24,14 @@ export default function QuickStart() {
     inProgress: new Set<string>(),
     failed: new Set<string>(),
   });
+  // Stops background pre-cache polling once the page goes away
+  const precacheAbort = useRef(new AbortController());
+
+  useEffect(() => {
+    const controller = new AbortController();
+    precacheAbort.current = controller;
+    return () => controller.abort();
+  }, []);
 
   // Background pre-cache function (no visual updates)
   const precacheLink = useCallback(async (url: string) => {
@@ -34,7 +46,7 @@ export default function QuickStart() {
     state.inProgress.add(url);
 
     try {
-      const response = await precacheUrl(url);
+      const response = await precacheUrl(url, precacheAbort.current.signal);
       console.log("[QuickStart] Precache completed:", url, response);
       
       if (response.cached) {
@@ -45,6 +57,9 @@ export default function QuickStart() {
         state.failed.add(url);
       }
     } catch (error) {
+      if (error instanceof Error && error.name === "AbortError") {
+        return;
+      }
       console.warn("[QuickStart] ✗ Precache error for:", url, error);
       state.failed.add(url);
     } finally {
@@ -71,6 +86,7 @@ export default function QuickStart() {
   async function handleAnalyze() {
     setLoading(true);
     setIsComplete(false);
+    setStreamed([]);
     
     const state = cachingState.current;
     console.log("[QuickStart] Starting analysis");
@@ -81,10 +97,17 @@ export default function QuickStart() {
     const startTime = performance.now();
 
     try {
-      const { data, error, requestId, failedUrls, message } = await scrapeCars({
-        urls: links,
-        userrole: "free",
-      });
+      const { data, error, requestId, failedUrls, message } = await scrapeCars(
+        {
+          urls: links,
+          userrole: "free",
+        },
+        (listing, cached) => {
+          const elapsed = Math.round(performance.now() - startTime);
+          console.log(`[QuickStart] Listing received after ${elapsed}ms (${cached ? "cached" : "scraped"}):`, listing.url);
+          setStreamed((prev) => [...prev, listing]);
+        }
+      );
 
       const elapsed = Math.round(performance.now() - startTime);
       console.log(`[QuickStart] API response received in ${elapsed}ms:`, { 
@@ -143,6 +166,15 @@ export default function QuickStart() {
         isComplete={isComplete}
         linkCount={links.length}
       />
+
+      {streamed.length > 0 && (
+        <section className="stream-results">
+          <p className="stream-progress">
+            {streamed.length} of {links.length} listing{links.length === 1 ? "" : "s"} received{loading ? "…" : ""}
+          </p>
+          <ResultsTable data={streamed} />
+        </section>
+      )}
     </main>
   );
 }
\ No newline at end of file
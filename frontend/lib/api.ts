@@ -1,39 +1,82 @@
-import { ScrapeRequest, CarListing, ApiError, ScrapeResponse } from "./types";
+import { ScrapeRequest, CarListing, ApiError, ScrapeStreamRecord } from "./types";
 
 const API_BASE =
   process.env.NEXT_PUBLIC_API_BASE ?? "http://localhost:8000";
 
+/**
+ * Scrape listings through the streaming endpoint.
+ * `onListing` is called for every listing as soon as the backend sends it
+ * (cache hits first, then scraped pages in completion order).
+ */
 export async function scrapeCars(
-  payload: ScrapeRequest
+  payload: ScrapeRequest,
+  onListing?: (listing: CarListing, cached: boolean) => void
 ): Promise<{ data?: CarListing[]; error?: ApiError; requestId?: string; failedUrls?: string[]; message?: string }> {
   const controller = new AbortController();
   const timeoutId = setTimeout(() => controller.abort(), 120000);
 
   try {
-    const res = await fetch(`${API_BASE}/api/scrape`, {
+    const res = await fetch(`${API_BASE}/api/scrape/stream`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
+        Accept: "application/x-ndjson",
       },
       body: JSON.stringify(payload),
       signal: controller.signal,
     });
 
-    clearTimeout(timeoutId);
-
     const requestId = res.headers.get("X-Request-ID") ?? undefined;
 
-    if (!res.ok) {
+    if (!res.ok || !res.body) {
+      clearTimeout(timeoutId);
       const err = (await res.json()) as ApiError;
       return { error: err, requestId };
     }
 
-    const response = (await res.json()) as ScrapeResponse;
+    const data: CarListing[] = [];
+    const failedUrls: string[] = [];
+    let message: string | undefined;
+
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      const record = JSON.parse(line) as ScrapeStreamRecord;
+      if (record.type === "listing") {
+        data.push(record.listing);
+        onListing?.(record.listing, record.cached);
+      } else if (record.type === "failed") {
+        failedUrls.push(record.url);
+      } else if (record.type === "summary") {
+        message = record.message ?? undefined;
+      }
+    };
+
+    // Read newline-delimited JSON records as they arrive
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let newline = buffer.indexOf("\n");
+      while (newline !== -1) {
+        handleLine(buffer.slice(0, newline));
+        buffer = buffer.slice(newline + 1);
+        newline = buffer.indexOf("\n");
+      }
+    }
+    handleLine(buffer + decoder.decode());
+
+    clearTimeout(timeoutId);
+
     return { 
-      data: response.results, 
+      data, 
       requestId,
-      failedUrls: response.failed_urls,
-      message: response.message
+      failedUrls,
+      message
     };
   } catch (error) {
     clearTimeout(timeoutId);
@@ -48,13 +91,73 @@ interface PrecacheResponse {
   status: string;
   url: string;
   cached: boolean;
+  job_id?: string | null;
+}
+
+interface PrecacheJobResponse {
+  job_id: string;
+  status: "queued" | "running" | "done";
+  urls: string[];
+  cached_urls: string[];
+  failed_urls: string[];
+  created_at: string;
+  finished_at?: string | null;
+}
+
+// Status polls back off from the first delay, doubling up to the cap
+const PRECACHE_POLL_FIRST_MS = 1000;
+const PRECACHE_POLL_MAX_MS = 15000;
+const PRECACHE_POLL_TIMEOUT_MS = 120000;
+
+/** Resolves after `ms`, or rejects with an AbortError once `signal` aborts. */
+function sleep(ms: number, signal?: AbortSignal): Promise<void> {
+  return new Promise((resolve, reject) => {
+    if (signal?.aborted) {
+      reject(new DOMException("Aborted", "AbortError"));
+      return;
+    }
+    const timeoutId = setTimeout(resolve, ms);
+    signal?.addEventListener("abort", () => {
+      clearTimeout(timeoutId);
+      reject(new DOMException("Aborted", "AbortError"));
+    }, { once: true });
+  });
+}
+
+/**
+ * Poll a queued pre-cache job until the backend has finished with it,
+ * backing off exponentially between status calls. Stops when `signal` aborts.
+ */
+async function waitForPrecacheJob(jobId: string, url: string, signal?: AbortSignal): Promise<PrecacheResponse> {
+  const deadline = performance.now() + PRECACHE_POLL_TIMEOUT_MS;
+  let delay = PRECACHE_POLL_FIRST_MS;
+
+  while (performance.now() < deadline) {
+    await sleep(delay, signal);
+    delay = Math.min(delay * 2, PRECACHE_POLL_MAX_MS);
+
+    const res = await fetch(`${API_BASE}/api/precache/${jobId}`, { signal });
+    if (!res.ok) {
+      throw new Error(`Precache status failed: ${res.statusText}`);
+    }
+
+    const job = (await res.json()) as PrecacheJobResponse;
+    if (job.status === "done") {
+      const cached = job.cached_urls.includes(url);
+      return { status: cached ? "cached" : "scrape_failed", url, cached, job_id: jobId };
+    }
+  }
+
+  return { status: "timeout", url, cached: false, job_id: jobId };
 }
 
 /**
  * Pre-cache a single URL in the background.
- * This triggers scraping and caching but doesn't return analysis data.
+ * The backend queues the scrape and answers immediately with a job id;
+ * this polls the job so callers still get the final cached/failed result.
+ * Aborting `signal` (e.g. when the page unmounts) stops the polling.
  */
-export async function precacheUrl(url: string): Promise<PrecacheResponse> {
+export async function precacheUrl(url: string, signal?: AbortSignal): Promise<PrecacheResponse> {
   const startTime = performance.now();
   console.log(`[API] Precache request started for: ${url}`);
   
@@ -65,17 +168,23 @@ export async function precacheUrl(url: string): Promise<PrecacheResponse> {
         "Content-Type": "application/json",
       },
       body: JSON.stringify({ url }),
+      signal,
     });
 
-    const elapsed = Math.round(performance.now() - startTime);
-
     if (!res.ok) {
+      const elapsed = Math.round(performance.now() - startTime);
       const errorText = await res.text();
       console.error(`[API] Precache failed (${res.status}) after ${elapsed}ms:`, errorText);
       throw new Error(`Precache failed: ${res.statusText}`);
     }
 
-    const data = await res.json() as PrecacheResponse;
+    let data = await res.json() as PrecacheResponse;
+    if (res.status === 202 && data.job_id) {
+      console.log(`[API] Precache queued as job ${data.job_id}`);
+      data = await waitForPrecacheJob(data.job_id, url, signal);
+    }
+
+    const elapsed = Math.round(performance.now() - startTime);
     console.log(`[API] Precache response (${elapsed}ms):`, data);
     
     return data;
@@ -84,4 +193,4 @@ export async function precacheUrl(url: string): Promise<PrecacheResponse> {
     console.error(`[API] Precache error after ${elapsed}ms:`, error);
     throw error;
   }
-}
\ No newline at end of file
+}
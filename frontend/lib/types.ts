@@ -57,5 +57,18 @@ export interface ApiError {
 export interface ScrapeResponse {
   results: CarListing[];
   failed_urls: string[];
+  stale_urls?: string[];
   message?: string;
-}
\ No newline at end of file
+}
+
+export type ScrapeStreamRecord =
+  | { type: "listing"; cached: boolean; stale?: boolean; listing: CarListing }
+  | { type: "failed"; url: string; error: string | null }
+  | {
+      type: "summary";
+      cached: number;
+      scraped: number;
+      failed_urls: string[];
+      stale_urls?: string[];
+      message?: string | null;
+    };